@@ -0,0 +1,66 @@
+import os
+from functools import partial
+from typing import Dict
+
+from sqlalchemy import func, select
+
+from cache import Materialized, catalog_cache
+from models import Ability, Mod, Warframe, Weapon
+
+# Catalog statistics for the dashboards. Each table's count, breakdowns
+# and averages are aggregated by a few GROUP BY queries and kept in memory,
+# tagged with the table's catalog cache version. Write routes bump that
+# version, so the next read re-aggregates only the tables that changed and
+# every other read is served from memory. STATS_TTL bounds how long rows
+# loaded outside the API (seeding, migrations) can go unnoticed.
+STATS_TTL = float(os.environ.get("STATS_TTL", "300"))
+
+# Per table: the model, the columns averaged and the columns counted by value
+AGGREGATES = {
+    "warframes": (Warframe, ("health", "shield", "armor", "energy"), ()),
+    "abilities": (Ability, ("energy_cost",), ()),
+    "weapons": (Weapon, ("damage", "critical_chance", "critical_multiplier", "status_chance"), ("type",)),
+    "mods": (Mod, ("drain",), ("type", "rarity")),
+}
+
+
+async def aggregate_table(db, table: str) -> dict:
+    """
+    Count, averages and breakdowns of one table.
+
+    Returns:
+        dict: {"count": n, "averages": {column: mean}, "by_<column>": {value: n}}
+    """
+    model, averaged, breakdowns = AGGREGATES[table]
+    row = (await db.execute(
+        select(func.count(), *(func.avg(getattr(model, column)) for column in averaged)).select_from(model)
+    )).one()
+    stats = {
+        "count": row[0],
+        # avg() of an integer column is a Decimal on PostgreSQL
+        "averages": {
+            column: None if value is None else round(float(value), 4)
+            for column, value in zip(averaged, row[1:])
+        },
+    }
+    for name in breakdowns:
+        column = getattr(model, name)
+        counts = await db.execute(select(column, func.count()).group_by(column))
+        stats[f"by_{name}"] = dict(sorted(
+            ("unknown" if value is None else str(value), count) for value, count in counts
+        ))
+    return stats
+
+
+# Aggregates of each table, re-aggregated when stale
+table_stats = {
+    table: Materialized((table,), STATS_TTL, partial(aggregate_table, table=table))
+    for table in AGGREGATES
+}
+
+
+async def catalog_stats(db) -> Dict[str, dict]:
+    """Aggregates of every catalog table, re-aggregating the stale ones"""
+    tables = list(AGGREGATES)
+    versions = await catalog_cache.versions(tables)
+    return {table: await table_stats[table].get(db, [version]) for table, version in zip(tables, versions)}
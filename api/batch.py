@@ -0,0 +1,113 @@
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import cache_response, cached_response
+from dependencies import get_db
+from loaders import warframe_options
+from models import Ability, Mod, Warframe, Weapon
+from schemas import AbilityResponse, BatchResponse, ModResponse, WarframeResponse, WeaponResponse
+from serializers import fetch_all
+
+# Most ids or names one batch lookup may ask for
+BATCH_MAX_KEYS = int(os.environ.get("BATCH_MAX_KEYS", "200"))
+
+# Tables with batch lookups: model, item shape, relationships to embed and
+# the tables responses are cached against
+BATCH_TABLES = {
+    "warframes": (Warframe, WarframeResponse, ("abilities",), ("warframes", "abilities")),
+    "abilities": (Ability, AbilityResponse, (), ("abilities",)),
+    "weapons": (Weapon, WeaponResponse, (), ("weapons",)),
+    "mods": (Mod, ModResponse, (), ("mods",)),
+}
+
+router = APIRouter()
+
+
+class BatchRequest(BaseModel):
+    ids: Optional[List[int]] = None
+    names: Optional[List[str]] = None
+
+
+def batch_keys(ids: Optional[List[int]], names: Optional[List[str]]):
+    """
+    Check a lookup asks for ids or names, not both, and drop repeated keys.
+
+    Returns:
+        tuple: The column to match ("id" or "name") and the keys in request order
+    """
+    if (ids is None) == (names is None):
+        raise HTTPException(status_code=400, detail="Pass either ids or names")
+    column, keys = ("id", ids) if ids is not None else ("name", names)
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        raise HTTPException(status_code=400, detail=f"No {column}s given")
+    if len(keys) > BATCH_MAX_KEYS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_KEYS} keys per batch")
+    return column, keys
+
+
+def split_query_list(value: Optional[str], convert=str) -> Optional[list]:
+    """Items of a comma-separated query parameter"""
+    if value is None:
+        return None
+    try:
+        return [convert(item.strip()) for item in value.split(",") if item.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid list: {value!r}")
+
+
+async def fetch_batch(db, table: str, column: str, keys: list) -> dict:
+    """
+    Load the rows matching keys with a single IN query.
+
+    Items follow the order of keys. When a name is shared by several rows,
+    as ability names can be, the oldest row is returned.
+
+    Returns:
+        dict: {"items": [...], "missing": [keys not found]}
+    """
+    model, response_model, relationships, _ = BATCH_TABLES[table]
+    query = select(model).where(getattr(model, column).in_(keys)).order_by(model.id)
+    if model is Warframe:
+        query = query.options(*warframe_options())
+    rows = await fetch_all(db, query, model, response_model, relationships)
+    found = {}
+    for row in rows:
+        found.setdefault(row[column] if isinstance(row, dict) else getattr(row, column), row)
+    return {
+        "items": [found[key] for key in keys if key in found],
+        "missing": [key for key in keys if key not in found],
+    }
+
+
+def add_batch_routes(table: str, tag: str):
+    _, response_model, _, cached_tables = BATCH_TABLES[table]
+    batch_model = BatchResponse[response_model]
+    description = f"Look up many {table} by id or by name in one query; items keep the request order"
+
+    @router.get(f"/{table}/batch", response_model=batch_model, tags=[tag], description=description)
+    async def batch_get(
+        request: Request,
+        ids: Optional[str] = Query(None, description="Comma-separated ids, e.g. 1,2,3"),
+        names: Optional[str] = Query(None, description="Comma-separated names; POST names containing commas"),
+        db: AsyncSession = Depends(get_db),
+    ):
+        column, keys = batch_keys(split_query_list(ids, int), split_query_list(names))
+        cached = await cached_response(request, cached_tables)
+        if cached is not None:
+            return cached
+        return await cache_response(request, batch_model, await fetch_batch(db, table, column, keys))
+
+    @router.post(f"/{table}/batch", response_model=batch_model, tags=[tag], description=description)
+    async def batch_post(lookup: BatchRequest, db: AsyncSession = Depends(get_db)):
+        column, keys = batch_keys(lookup.ids, lookup.names)
+        return await fetch_batch(db, table, column, keys)
+
+
+for _table, _tag in (("warframes", "Warframes"), ("abilities", "Abilities"), ("weapons", "Weapons"), ("mods", "Mods")):
+    add_batch_routes(_table, _tag)
@@ -0,0 +1,232 @@
+import os
+from typing import List, Optional, Tuple
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dependencies import get_db
+from metrics import timed_serialization
+from mod_effects import parse_effect
+from models import Mod, Warframe, Weapon
+from schemas import BuildEvaluation
+from weapon_stats import METRICS as WEAPON_METRICS
+from weapon_stats import STAT_COLUMNS as WEAPON_STATS
+
+# Most mod sets one evaluation may score, and most mods in a set
+BUILD_MAX_SETS = int(os.environ.get("BUILD_MAX_SETS", "10000"))
+BUILD_MAX_MODS = int(os.environ.get("BUILD_MAX_MODS", "12"))
+
+WARFRAME_STATS = ("health", "shield", "armor", "energy")
+
+# Damage a warframe can take before going down: shields absorb it first,
+# armor reduces health damage by armor / (armor + 300)
+WARFRAME_METRICS = {
+    "effective_health": lambda stats: stats["health"] * (1 + stats["armor"] / 300) + stats["shield"],
+}
+
+# What a build can be evaluated on: model, modified stats, derived metrics
+TARGETS = {
+    "weapon": (Weapon, WEAPON_STATS, {name: metric for name, metric in WEAPON_METRICS.items() if name not in WEAPON_STATS}),
+    "warframe": (Warframe, WARFRAME_STATS, WARFRAME_METRICS),
+}
+
+# Mod types each target accepts: a weapon takes the mods of its slot, named
+# after the slot or after the weapon classes it holds, a warframe takes
+# Warframe mods. Weapons of another type only take mods of that same type.
+WEAPON_MOD_TYPES = {
+    "Primary": ("Primary", "Rifle", "Shotgun", "Sniper", "Bow"),
+    "Secondary": ("Secondary", "Pistol"),
+    "Melee": ("Melee",),
+}
+WARFRAME_MOD_TYPES = ("Warframe",)
+
+router = APIRouter(prefix="/builds", tags=["Builds"])
+
+
+class BuildRequest(BaseModel):
+    weapon_id: Optional[int] = None
+    warframe_id: Optional[int] = None
+    # Candidate mod sets, as lists of mod ids
+    builds: List[List[int]]
+    rank_by: Optional[str] = Field(None, description="Stat or metric to sort the builds by, highest first")
+    limit: Optional[int] = Field(None, ge=1, description="Return at most this many builds")
+
+
+async def read_build_request(request: Request) -> Tuple[BuildRequest, List[List[int]]]:
+    """
+    Parse an evaluation body.
+
+    Thousands of builds through BuildRequest cost far more than evaluating
+    them, so only the other fields are validated by the model and the
+    builds get a plain type check.
+
+    Returns:
+        tuple: The request without its builds, and the builds
+    """
+    try:
+        payload = orjson.loads(await request.body())
+    except orjson.JSONDecodeError as exc:
+        raise HTTPException(status_code=400, detail=f"Malformed body: {exc}")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Expected a JSON object")
+    builds = payload.get("builds")
+    if not isinstance(builds, list) or not all(
+        isinstance(build, list) and all(type(mod_id) is int for mod_id in build) for build in builds
+    ):
+        raise HTTPException(status_code=400, detail="builds must be a list of lists of mod ids")
+    try:
+        return BuildRequest.parse_obj({**payload, "builds": []}), builds
+    except ValidationError as exc:
+        raise RequestValidationError(exc.raw_errors)
+
+
+def mod_effect(mod) -> dict:
+    modifiers, unparsed = parse_effect(mod.effect)
+    return {
+        "id": mod.id,
+        "name": mod.name,
+        "modifiers": [modifier._asdict() for modifier in modifiers],
+        "unparsed": list(unparsed),
+    }
+
+
+def mod_matrices(np, mods: list, stats: tuple):
+    """
+    Percent and flat bonuses of each mod, one row per mod and one column
+    per stat. Modifiers for stats the target does not have are ignored.
+    """
+    column = {stat: index for index, stat in enumerate(stats)}
+    percent = np.zeros((len(mods), len(stats)))
+    flat = np.zeros((len(mods), len(stats)))
+    for row, mod in enumerate(mods):
+        for modifier in parse_effect(mod.effect)[0]:
+            if modifier.stat in column:
+                if modifier.kind == "percent":
+                    percent[row, column[modifier.stat]] += modifier.value / 100
+                else:
+                    flat[row, column[modifier.stat]] += modifier.value
+    return percent, flat
+
+
+def evaluate(base: dict, stats: tuple, metrics: dict, mods: list, builds: List[List[int]]) -> dict:
+    """
+    Final stats of every build in one vectorized pass.
+
+    Percent bonuses of a build add up and scale the base stat, flat
+    bonuses are added afterwards, as in game. Each stat total is one
+    np.bincount over the (build, mod) pairs of all builds at once.
+
+    Args:
+        base: The target's stats
+        stats: Names of the stats mods modify
+        metrics: Derived metrics computed from the final stats
+        mods: The Mod rows, builds refer to them by position
+        builds: Mod positions of each build
+
+    Returns:
+        dict: Arrays of every stat and metric, one value per build
+    """
+    import numpy as np
+
+    percent, flat = mod_matrices(np, mods, stats)
+    build_rows = np.repeat(np.arange(len(builds)), [len(build) for build in builds])
+    mod_rows = np.fromiter((position for build in builds for position in build), dtype=np.int64, count=len(build_rows))
+    final = {}
+    with np.errstate(invalid="ignore", over="ignore"):
+        for index, stat in enumerate(stats):
+            scale = np.bincount(build_rows, weights=percent[mod_rows, index], minlength=len(builds))
+            bonus = np.bincount(build_rows, weights=flat[mod_rows, index], minlength=len(builds))
+            value = np.nan if base[stat] is None else float(base[stat])
+            final[stat] = value * (1 + scale) + bonus
+        for name, metric in metrics.items():
+            final[name] = metric(final)
+    return final
+
+
+def build_order(final: dict, rank_by: Optional[str], limit: Optional[int]) -> List[int]:
+    """Indexes of the builds to return, best first when ranking"""
+    import numpy as np
+
+    if rank_by is None:
+        order = np.arange(len(next(iter(final.values()))))
+    else:
+        # Stable, so equal builds keep their request order; NaN sorts last
+        order = np.argsort(-final[rank_by], kind="stable")
+    return order[:limit].tolist()
+
+
+@router.post(
+    "/evaluate",
+    response_model=BuildEvaluation,
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": BuildRequest.schema()}}}},
+)
+async def evaluate_builds(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Apply many candidate mod sets to a weapon or a warframe and return the
+    final stats of each. A mod listed twice in a set counts once; mods that
+    do not exist are reported in missing_mods and skipped, mods of a type
+    the target does not take are rejected.
+    """
+    build_request, requested_builds = await read_build_request(request)
+    if (build_request.weapon_id is None) == (build_request.warframe_id is None):
+        raise HTTPException(status_code=400, detail="Pass either weapon_id or warframe_id")
+    target, target_id = (
+        ("weapon", build_request.weapon_id) if build_request.weapon_id is not None
+        else ("warframe", build_request.warframe_id)
+    )
+    model, stats, metrics = TARGETS[target]
+    if not requested_builds:
+        raise HTTPException(status_code=400, detail="No builds given")
+    if len(requested_builds) > BUILD_MAX_SETS:
+        raise HTTPException(status_code=400, detail=f"At most {BUILD_MAX_SETS} builds per evaluation")
+    if any(len(build) > BUILD_MAX_MODS for build in requested_builds):
+        raise HTTPException(status_code=400, detail=f"At most {BUILD_MAX_MODS} mods per build")
+    if build_request.rank_by is not None and build_request.rank_by not in (*stats, *metrics):
+        raise HTTPException(status_code=400, detail=f"Cannot rank {target} builds by {build_request.rank_by!r}")
+
+    columns = [getattr(model, stat) for stat in stats]
+    if target == "weapon":
+        columns.append(Weapon.type)
+    row = (await db.execute(select(*columns).where(model.id == target_id))).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"{target.capitalize()} not found")
+    base = dict(zip(stats, row))
+    if target == "weapon":
+        target_name = f"{row[-1]} weapon"
+        mod_types = WEAPON_MOD_TYPES.get(row[-1], (row[-1],))
+    else:
+        target_name, mod_types = "warframe", WARFRAME_MOD_TYPES
+
+    # Every mod of every build in one IN query
+    requested = list(dict.fromkeys(mod_id for build in requested_builds for mod_id in build))
+    mods = (await db.scalars(select(Mod).where(Mod.id.in_(requested)).order_by(Mod.id))).all()
+    misfits = [mod.id for mod in mods if mod.type not in mod_types]
+    if misfits:
+        misfits = ", ".join(map(str, misfits))
+        raise HTTPException(
+            status_code=400, detail=f"Mods that do not fit a {target_name}: {misfits}; use {', '.join(mod_types)} mods"
+        )
+    position = {mod.id: index for index, mod in enumerate(mods)}
+    builds = [list(dict.fromkeys(position[mod_id] for mod_id in build if mod_id in position))
+              for build in requested_builds]
+
+    final = evaluate(base, stats, metrics, mods, builds)
+    order = build_order(final, build_request.rank_by, build_request.limit)
+    columns = {name: values.tolist() for name, values in final.items()}
+    with timed_serialization():
+        return ORJSONResponse({
+            "target": target,
+            "base": base,
+            "mods": [mod_effect(mod) for mod in mods],
+            "missing_mods": [mod_id for mod_id in requested if mod_id not in position],
+            "results": [
+                {"index": index, "mods": [mods[p].id for p in builds[index]],
+                 "stats": {name: values[index] for name, values in columns.items()}}
+                for index in order
+            ],
+        })
@@ -0,0 +1,162 @@
+import importlib
+import os
+from typing import List
+
+import orjson
+from fastapi import HTTPException, Request
+from pydantic import validate_model
+from sqlalchemy import insert, select, update
+
+# Upper bound on the items accepted by one bulk request
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", "10000"))
+# Rows per INSERT statement, further capped by the driver's parameter limit
+BULK_BATCH_SIZE = int(os.environ.get("BULK_BATCH_SIZE", "1000"))
+MAX_PARAMETERS = 30000
+
+# Dialects with INSERT ... ON CONFLICT, imported on first use
+UPSERT_DIALECTS = ("postgresql", "sqlite")
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+
+
+def openapi_body(schema_name: str) -> dict:
+    """OpenAPI requestBody for a bulk route taking items of a create schema"""
+    items = {"type": "array", "items": {"$ref": f"#/components/schemas/{schema_name}"}}
+    content = {"application/json": {"schema": items}}
+    content.update({media_type: {"schema": {"type": "string"}} for media_type in NDJSON_MEDIA_TYPES})
+    return {"requestBody": {"required": True, "content": content}}
+
+
+async def read_items(request: Request) -> list:
+    """
+    Parse a bulk request body: a JSON array, or NDJSON with one object per line.
+
+    Raises:
+        HTTPException: 400 for malformed bodies, 413 for too many items
+    """
+    body = await request.body()
+    content_type = request.headers.get("Content-Type", "").split(";")[0].strip()
+    try:
+        if content_type in NDJSON_MEDIA_TYPES:
+            items = [orjson.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = orjson.loads(body)
+    except orjson.JSONDecodeError as exc:
+        raise HTTPException(status_code=400, detail=f"Malformed body: {exc}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON lines")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ITEMS} items per request")
+    return items
+
+
+def validate_items(items: list, create_model):
+    """
+    Validate raw items against a create model.
+
+    Returns:
+        tuple: (rows, results) where rows holds (index, dict) pairs of valid
+        items and results has an entry for every item, invalid ones filled in
+    """
+    rows, results = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results.append({"index": index, "status": "invalid", "errors": [{"msg": "expected an object"}]})
+            continue
+        # validate_model skips building a model instance per item
+        values, _, error = validate_model(create_model, item)
+        if error is not None:
+            results.append({"index": index, "status": "invalid", "errors": error.errors()})
+            continue
+        rows.append((index, values))
+        results.append({"index": index, "status": None})
+    return rows, results
+
+
+def upsert_by_name(session, model, rows: List[dict]) -> dict:
+    """
+    Insert or update rows keyed on their name, without committing.
+
+    Uses INSERT ... ON CONFLICT (name) DO UPDATE when the name column is
+    unique, otherwise updates the rows whose name exists and inserts the
+    rest. Either way the work is a handful of statements per batch.
+    Synchronous so the seeding scripts can share it; routes call it
+    through the session's run_sync().
+
+    Args:
+        session: A sync Session
+        model: The mapped class
+        rows: Column dicts with distinct names
+
+    Returns:
+        dict: name -> (id, "created" | "updated")
+    """
+    outcome = {}
+    columns = list(rows[0]) if rows else []
+    batch_size = max(1, min(BULK_BATCH_SIZE, MAX_PARAMETERS // max(len(columns), 1)))
+    dialect = session.get_bind().dialect.name
+    unique_name = bool(model.__table__.c.name.unique)
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        names = [row["name"] for row in batch]
+        existing = dict(
+            session.execute(
+                select(model.name, model.id).where(model.name.in_(names)).order_by(model.id.desc())
+            ).all()
+        )
+
+        if unique_name and dialect in UPSERT_DIALECTS:
+            # executemany form: compiled once, batched by insertmanyvalues
+            stmt = importlib.import_module(f"sqlalchemy.dialects.{dialect}").insert(model)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[model.name],
+                set_={column: stmt.excluded[column] for column in columns if column != "name"},
+            ).returning(model.name, model.id)
+            ids = dict(session.execute(stmt, batch).all())
+        else:
+            to_update = [{"id": existing[row["name"]], **row} for row in batch if row["name"] in existing]
+            to_insert = [row for row in batch if row["name"] not in existing]
+            if to_update:
+                session.execute(update(model), to_update)
+            ids = {row["name"]: row["id"] for row in to_update}
+            if to_insert:
+                inserted = session.execute(insert(model).returning(model.name, model.id), to_insert)
+                ids.update(inserted.all())
+
+        for name in names:
+            outcome[name] = (ids[name], "updated" if name in existing else "created")
+    return outcome
+
+
+async def bulk_upsert(db, request: Request, model, create_model) -> dict:
+    """
+    Handle a bulk upsert request in a single transaction.
+
+    Items that fail validation are reported and skipped. When several items
+    share a name the last one wins and the earlier ones are reported as
+    duplicates.
+
+    Returns:
+        dict: Totals and per-item results in request order
+    """
+    rows, results = validate_items(await read_items(request), create_model)
+
+    last_by_name = {}
+    for index, row in rows:
+        last_by_name[row["name"]] = index
+    unique_rows = [row for index, row in rows if last_by_name[row["name"]] == index]
+
+    outcome = await db.run_sync(upsert_by_name, model, unique_rows)
+    await db.commit()
+
+    for index, row in rows:
+        result = results[index]
+        result["name"] = row["name"]
+        result["id"], status = outcome[row["name"]]
+        result["status"] = status if last_by_name[row["name"]] == index else "duplicate"
+
+    totals = {status: 0 for status in ("created", "updated", "duplicate", "invalid")}
+    for result in results:
+        totals[result["status"]] += 1
+    return {**totals, "results": results}
@@ -0,0 +1,407 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from compression import compress_body, request_encoding
+from http_cache import compute_etag, conditional_response
+from serializers import render_body
+
+# Read-through cache for catalog GET responses. CACHE_TTL=0 disables it.
+# CACHE_BACKEND picks where entries live: "memory" (per process), "redis"
+# (shared by every instance) or "sqlite" (a local file, for tests and dev).
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory")
+CACHE_TTL = float(os.environ.get("CACHE_TTL", "300"))
+CACHE_MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "1024"))
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL") or os.environ.get("KV_URL") or "redis://localhost:6379/0"
+CACHE_SQLITE_PATH = os.environ.get("CACHE_SQLITE_PATH", "warframe-cache.sqlite3")
+CACHE_KEY_PREFIX = os.environ.get("CACHE_KEY_PREFIX", "warframe-api:")
+
+
+class CacheBackend:
+    """
+    Storage for cache entries and per-table version counters.
+
+    Implementations only store opaque bytes; versioning and invalidation are
+    handled by ResponseCache so every backend behaves the same.
+    """
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        raise NotImplementedError
+
+    async def incr(self, key: str) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    """Per-process LRU store bounded by entry count and total size"""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._counters = {}
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    async def get_many(self, keys):
+        now = time.monotonic()
+        values = []
+        for key in keys:
+            if key in self._counters:
+                values.append(str(self._counters[key]).encode())
+                continue
+            item = self._entries.get(key)
+            if item is not None and item[1] <= now:
+                self._remove(key)
+                self.expirations += 1
+                item = None
+            if item is not None:
+                self._entries.move_to_end(key)
+            values.append(item[0] if item is not None else None)
+        return values
+
+    async def set(self, key, value, ttl):
+        if len(value) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self.bytes += len(value)
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def incr(self, key):
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self.bytes -= len(value)
+
+
+class RedisBackend(CacheBackend):
+    """Shared store on any Redis-compatible server (Redis, Valkey, Upstash)"""
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package")
+        self.client = redis.from_url(url)
+
+    async def get_many(self, keys):
+        return await self.client.mget(keys)
+
+    async def set(self, key, value, ttl):
+        await self.client.set(key, value, px=int(ttl * 1000))
+
+    async def incr(self, key):
+        return await self.client.incr(key)
+
+
+class SQLiteBackend(CacheBackend):
+    """Store in a local SQLite file, shared by processes on the same machine"""
+
+    def __init__(self, path: str, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)")
+
+    async def get_many(self, keys):
+        return await run_in_threadpool(self._get_many, keys)
+
+    async def set(self, key, value, ttl):
+        await run_in_threadpool(self._set, key, value, ttl)
+
+    async def incr(self, key):
+        return await run_in_threadpool(self._incr, key)
+
+    def _get_many(self, keys):
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, value FROM cache WHERE key IN ({placeholders})"
+                " AND (expires_at IS NULL OR expires_at > ?)",
+                [*keys, time.time()],
+            ).fetchall()
+        found = dict(rows)
+        return [found.get(key) for key in keys]
+
+    def _set(self, key, value, ttl):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl),
+            )
+            # Drop expired rows, then the ones closest to expiry, past the bound
+            self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache WHERE expires_at IS NOT NULL"
+                " ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def _incr(self, key):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cache (key, value, expires_at) VALUES (?, '1', NULL)"
+                " ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1",
+                (key,),
+            )
+            (value,) = self._conn.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+        return int(value)
+
+
+def create_backend(name: str) -> CacheBackend:
+    """Instantiate the cache backend selected by CACHE_BACKEND"""
+    if name == "memory":
+        return MemoryBackend(CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+    if name == "redis":
+        return RedisBackend(CACHE_REDIS_URL)
+    if name == "sqlite":
+        return SQLiteBackend(CACHE_SQLITE_PATH, CACHE_MAX_ENTRIES)
+    raise ValueError(f"Unknown CACHE_BACKEND: {name}")
+
+
+class ResponseCache:
+    """
+    Versioned response cache on top of a CacheBackend.
+
+    Every table has a version counter stored in the backend. Entries record
+    the versions of the tables they were read from, and a lookup fetches the
+    entry and the current versions in one round trip. Write routes bump the
+    versions, which invalidates the affected entries on every instance
+    sharing the backend.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    async def get(self, key: str, tables: Iterable[str]):
+        """
+        Look up an entry.
+
+        Returns:
+            tuple: (body, headers) or None on a miss, and the table versions
+            to store a fresh entry with
+        """
+        tables = tuple(tables)
+        values = await self.backend.get_many(
+            [CACHE_KEY_PREFIX + key] + [version_key(table) for table in tables]
+        )
+        versions = [int(value or 0) for value in values[1:]]
+        if values[0] is None:
+            self.misses += 1
+            return None, versions
+        body, headers, entry_versions = decode_entry(values[0])
+        if entry_versions != versions:
+            self.stale += 1
+            self.misses += 1
+            return None, versions
+        self.hits += 1
+        return (body, headers), versions
+
+    async def set(self, key: str, body: bytes, headers: dict, versions: List[int]):
+        if self.enabled:
+            await self.backend.set(CACHE_KEY_PREFIX + key, encode_entry(body, headers, versions), self.ttl)
+
+    async def versions(self, tables: Iterable[str]) -> List[int]:
+        """Current version of each table, bumped by every invalidate()"""
+        values = await self.backend.get_many([version_key(table) for table in tables])
+        return [int(value or 0) for value in values]
+
+    async def invalidate(self, *tables: str):
+        """Bump the version of each table, orphaning every entry read from it"""
+        for table in tables:
+            await self.backend.incr(version_key(table))
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "stale": self.stale,
+            "invalidations": self.invalidations,
+            **self.backend.stats(),
+        }
+
+
+def version_key(table: str) -> str:
+    return f"{CACHE_KEY_PREFIX}version:{table}"
+
+
+def encode_entry(body: bytes, headers: dict, versions: List[int]) -> bytes:
+    meta = json.dumps({"h": headers, "v": versions}, separators=(",", ":"))
+    return meta.encode() + b"\n" + body
+
+
+def decode_entry(value: bytes):
+    meta, body = value.split(b"\n", 1)
+    meta = json.loads(meta)
+    return body, meta["h"], meta["v"]
+
+
+catalog_cache = ResponseCache(create_backend(CACHE_BACKEND), CACHE_TTL)
+
+
+class Materialized:
+    """
+    A value computed from catalog tables and kept in process memory.
+
+    The value is tagged with the catalog cache versions of its tables and
+    rebuilt when a write route bumps one of them, or after ttl seconds,
+    which also picks up rows loaded outside the API. One rebuild runs at a
+    time; concurrent reads wait for it and use its result.
+    """
+
+    def __init__(self, tables: Iterable[str], ttl: float, build: Callable[[Any], Awaitable]):
+        """
+        Args:
+            tables: Tables the value is computed from
+            ttl: Seconds a value is used for while its tables are unchanged
+            build: Coroutine function computing the value from a session
+        """
+        self.tables = tuple(tables)
+        self.ttl = ttl
+        self.build = build
+        # (value, versions, time.monotonic() when built)
+        self._entry = None
+        self._lock = asyncio.Lock()
+
+    def fresh(self, versions: List[int]) -> bool:
+        entry = self._entry
+        return entry is not None and entry[1] == versions and time.monotonic() - entry[2] < self.ttl
+
+    async def get(self, db, versions: Optional[List[int]] = None):
+        """
+        The value, rebuilt first when stale.
+
+        Versions are read before the rebuild runs, so a write landing during
+        it leaves the value stale and the next read picks the write up.
+
+        Args:
+            db: Session passed to build
+            versions: Current versions of the tables, when already fetched
+        """
+        if versions is None:
+            versions = await catalog_cache.versions(self.tables)
+        versions = list(versions)
+        if not self.fresh(versions):
+            async with self._lock:
+                if not self.fresh(versions):
+                    self._entry = (await self.build(db), versions, time.monotonic())
+        return self._entry[0]
+
+
+def request_key(request: Request) -> str:
+    """
+    Cache key made of the route path, its sorted query parameters and the
+    negotiated content coding, each coding being stored compressed
+    """
+    query = urlencode(sorted(request.query_params.multi_items()))
+    encoding = request_encoding(request.headers)
+    return f"{request.url.path}?{query}" + (f"#{encoding}" if encoding else "")
+
+
+async def cached_response(request: Request, tables: Iterable[str]) -> Optional[Response]:
+    """
+    Serve a GET request from the catalog cache.
+
+    Args:
+        request: The request being answered
+        tables: Tables the response is read from
+
+    Returns:
+        Response: The cached response, or None on a miss
+    """
+    if not catalog_cache.enabled:
+        return None
+    entry, versions = await catalog_cache.get(request_key(request), tables)
+    # Remembered so the entry stored after a miss is tagged with the
+    # versions seen before the data was read
+    request.state.cache_versions = versions
+    if entry is None:
+        return None
+    body, headers = entry
+    return conditional_response(request, body, headers)
+
+
+async def cache_response(
+    request: Request, response_model, data, headers: Optional[dict] = None, fields: Optional[List[str]] = None
+) -> Response:
+    """
+    Serialize data through its response model, cache it and build the response.
+
+    The body's ETag is computed here and cached with it, so conditional
+    requests answered from the cache never rehash the body. The body is
+    compressed for the request's Accept-Encoding before it is stored, so a
+    hot entry is compressed once rather than on every hit.
+
+    Args:
+        request: The request being answered, looked up with cached_response()
+        response_model: The route's response model, e.g. List[WeaponResponse]
+        data: ORM objects, or dicts from serializers.fetch_all()
+        headers: Extra response headers to cache alongside the body
+        fields: Sparse fieldset the dicts in data are trimmed to
+
+    Returns:
+        Response: The JSON response
+    """
+    return await cache_body(request, render_body(response_model, data, fields), headers)
+
+
+async def cache_body(request: Request, body: bytes, headers: Optional[dict] = None) -> Response:
+    """Like cache_response(), for a JSON body the route has already rendered"""
+    headers = {**(headers or {}), "ETag": compute_etag(body)}
+    body, headers = compress_body(body, headers, request_encoding(request.headers))
+    versions = getattr(request.state, "cache_versions", None)
+    if versions is not None:
+        await catalog_cache.set(request_key(request), body, headers, versions)
+    return conditional_response(request, body, headers)
@@ -0,0 +1,212 @@
+import os
+import zlib
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Negotiated response compression. COMPRESSION_ENCODINGS lists the codings
+# offered, preferred first when a client accepts several equally; br and
+# zstd are only offered when the brotli and zstandard packages are
+# installed. An empty list turns compression off. Bodies smaller than
+# COMPRESSION_MIN_SIZE bytes are sent as they are.
+COMPRESSION_ENCODINGS = os.environ.get("COMPRESSION_ENCODINGS", "br,zstd,gzip")
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_ZSTD_LEVEL = int(os.environ.get("COMPRESSION_ZSTD_LEVEL", "3"))
+
+# Media types worth compressing; images and archives already are
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/javascript")
+
+_AVAILABLE = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+ENCODINGS = tuple(
+    name for name in (name.strip() for name in COMPRESSION_ENCODINGS.split(","))
+    if name and _AVAILABLE.get(name)
+)
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the coding to answer an Accept-Encoding header with.
+
+    Returns:
+        str: The accepted coding with the highest q-value, ties broken by
+        ENCODINGS order, or None for an uncompressed response
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+    best, best_weight = None, 0.0
+    for name in ENCODINGS:
+        weight = weights.get(name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+def request_encoding(headers) -> Optional[str]:
+    """Coding negotiated for a request's headers, None when compression is off"""
+    if not ENCODINGS:
+        return None
+    return negotiate(headers.get("accept-encoding", ""))
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a whole body with one of ENCODINGS"""
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(body)
+    return zlib.compress(body, COMPRESSION_GZIP_LEVEL, wbits=31)
+
+
+class StreamEncoder:
+    """Incremental compressor flushing after every chunk, so streams stay live"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        elif encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+        else:
+            self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        if self.encoding == "zstd":
+            return self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def weak_etag(etag: str) -> str:
+    """
+    ETag of a compressed representation.
+
+    The bytes differ from the identity body, so the tag is made weak; the
+    If-None-Match check compares weakly and still matches either form.
+    """
+    return etag if etag.startswith("W/") else "W/" + etag
+
+
+def compress_body(body: bytes, headers: dict, encoding: Optional[str]) -> Tuple[bytes, dict]:
+    """
+    Compress a rendered body for a negotiated coding.
+
+    Used by the response cache, which stores the result so a hot entry is
+    compressed once rather than on every hit.
+
+    Args:
+        body: The identity body
+        headers: Its response headers, including the ETag
+        encoding: Result of request_encoding(), None to leave it as is
+
+    Returns:
+        tuple: The body and headers to send
+    """
+    if not ENCODINGS:
+        return body, headers
+    headers = {**headers, "Vary": "Accept-Encoding"}
+    if encoding is None or len(body) < COMPRESSION_MIN_SIZE:
+        return body, headers
+    headers["Content-Encoding"] = encoding
+    if "ETag" in headers:
+        headers["ETag"] = weak_etag(headers["ETag"])
+    return compress(body, encoding), headers
+
+
+def compressible(status: int, headers: Headers) -> bool:
+    if status < 200 or status in (204, 206, 304) or "content-encoding" in headers:
+        return False
+    return headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses the routes did not already compress.
+
+    Whole bodies are compressed in one go once they reach
+    COMPRESSION_MIN_SIZE; streamed bodies are compressed chunk by chunk.
+    Responses carrying a Content-Encoding, like cached entries stored
+    precompressed, pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not ENCODINGS:
+            await self.app(scope, receive, send)
+            return
+        encoding = request_encoding(Headers(scope=scope))
+        start = None
+        encoder = None
+
+        async def send_compressed(message: Message):
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows how big it is
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if start is None:
+                if encoder is not None:
+                    more_body = message.get("more_body", False)
+                    chunk = encoder.compress(message.get("body", b""))
+                    message = {**message, "body": chunk + encoder.finish() if not more_body else chunk}
+                await send(message)
+                return
+
+            response_start, start = start, None
+            headers = MutableHeaders(raw=response_start["headers"])
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressible(response_start["status"], headers):
+                if "accept-encoding" not in headers.get("vary", "").lower():
+                    headers.add_vary_header("Accept-Encoding")
+                if encoding is not None and (more_body or len(body) >= COMPRESSION_MIN_SIZE):
+                    headers["Content-Encoding"] = encoding
+                    if "etag" in headers:
+                        headers["ETag"] = weak_etag(headers["etag"])
+                    if more_body:
+                        encoder = StreamEncoder(encoding)
+                        del headers["content-length"]
+                        message = {**message, "body": encoder.compress(body)}
+                    else:
+                        body = compress(body, encoding)
+                        headers["Content-Length"] = str(len(body))
+                        message = {**message, "body": body}
+            await send(response_start)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
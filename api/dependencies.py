@@ -1,34 +1,49 @@
+import os
+import secrets
+
 from fastapi import HTTPException, Request
 
-from utils import is_browser
-from database import SessionLocal
+from utils import client_info
+from database import session_scope
 
 def browser_only(request: Request):
     """Dependency that only allows browser requests"""
-    user_agent = request.headers.get("User-Agent", "")
-    if not is_browser(user_agent):
+    if not client_info(request).is_browser:
         raise HTTPException(status_code=403, detail="This endpoint is only available for browsers")
     return True
 
 def api_client_only(request: Request):
     """Dependency that only allows API client requests"""
-    user_agent = request.headers.get("User-Agent", "")
-    if is_browser(user_agent):
+    if client_info(request).is_browser:
         raise HTTPException(status_code=403, detail="This endpoint is only available for API clients")
     return True
 
+def is_admin(provided: str) -> bool:
+    """Whether provided matches the configured ADMIN_TOKEN (never, if none is set)"""
+    # Compared as bytes: compare_digest rejects str holding non-ASCII characters
+    admin_token = os.environ.get("ADMIN_TOKEN")
+    return bool(admin_token) and secrets.compare_digest(provided.encode(), admin_token.encode())
+
+def internal_only(request: Request):
+    """Dependency that only allows requests carrying the admin token"""
+    if not os.environ.get("ADMIN_TOKEN"):
+        # Internal endpoints are disabled unless a token is configured
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(request.headers.get("X-Admin-Token", "")):
+        raise HTTPException(status_code=403, detail="This endpoint requires an admin token")
+    return True
+
 def get_client_info(request: Request):
     """Dependency that provides client information"""
-    user_agent = request.headers.get("User-Agent", "")
+    info = client_info(request)
     return {
-        "is_browser": is_browser(user_agent),
-        "user_agent": user_agent
+        "is_browser": info.is_browser,
+        "is_bot": info.is_bot,
+        "browser_family": info.family,
+        "user_agent": request.headers.get("User-Agent", "")
     }
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with session_scope() as db:
         yield db
-    finally:
-        db.close()
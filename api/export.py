@@ -0,0 +1,81 @@
+import os
+from typing import AsyncIterator
+
+import orjson
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from database import session_scope
+from metrics import timed_serialization
+from models import Ability, Mod, Warframe, Weapon
+from schemas import AbilityResponse, ModResponse, WarframeResponse, WeaponResponse
+from serializers import attach_relationships, scalar_fields
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "1000"))
+
+# Exportable tables with their model, row shape and relationships to embed
+EXPORTS = {
+    "warframes": (Warframe, WarframeResponse, ("abilities",)),
+    "abilities": (Ability, AbilityResponse, ()),
+    "weapons": (Weapon, WeaponResponse, ()),
+    "mods": (Mod, ModResponse, ()),
+}
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+async def stream_table(db, table: str, wrap: bool = False) -> AsyncIterator[bytes]:
+    """
+    Stream a table as NDJSON, one chunk per batch of rows.
+
+    Rows are read through a server-side cursor, so memory use is bounded by
+    EXPORT_BATCH_SIZE and the first batch is sent before the query is done.
+
+    Args:
+        db: The session
+        table: Key of EXPORTS
+        wrap: Emit {"table": ..., "data": row} lines instead of bare rows
+    """
+    model, response_model, relationships = EXPORTS[table]
+    fields = scalar_fields(response_model)
+    query = (
+        select(*(getattr(model, name) for name in fields))
+        .order_by(model.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    result = await db.stream(query)
+    async for partition in result.partitions():
+        items = [dict(zip(fields, row)) for row in partition]
+        await attach_relationships(db, model, response_model, items, relationships)
+        if wrap:
+            items = [{"table": table, "data": item} for item in items]
+        with timed_serialization():
+            chunk = b"".join(orjson.dumps(item) + b"\n" for item in items)
+        yield chunk
+
+
+async def stream_tables(*tables: str) -> AsyncIterator[bytes]:
+    # The response outlives the request's dependencies, so the stream opens
+    # its own session
+    async with session_scope() as db:
+        for table in tables:
+            async for chunk in stream_table(db, table, wrap=len(tables) > 1):
+                yield chunk
+
+
+@router.get("/all.ndjson")
+async def export_all():
+    """Stream every table as NDJSON lines of {"table": ..., "data": ...}"""
+    return StreamingResponse(stream_tables(*EXPORTS), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get("/{table}.ndjson")
+async def export_table(table: str):
+    """Stream one table as NDJSON, one row per line"""
+    if table not in EXPORTS:
+        raise HTTPException(status_code=404, detail="Unknown export table")
+    return StreamingResponse(stream_tables(table), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,64 @@
+import hashlib
+import os
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Cache-Control sent with catalog GET responses. The defaults make clients
+# revalidate every time, which is cheap thanks to ETags. HTTP_CACHE_S_MAXAGE
+# and HTTP_CACHE_STALE_WHILE_REVALIDATE let Vercel's edge serve them too.
+HTTP_CACHE_MAX_AGE = int(os.environ.get("HTTP_CACHE_MAX_AGE", "0"))
+HTTP_CACHE_S_MAXAGE = os.environ.get("HTTP_CACHE_S_MAXAGE")
+HTTP_CACHE_STALE_WHILE_REVALIDATE = os.environ.get("HTTP_CACHE_STALE_WHILE_REVALIDATE")
+
+
+def cache_control() -> str:
+    """Build the Cache-Control header value from the configuration"""
+    directives = ["public", f"max-age={HTTP_CACHE_MAX_AGE}"]
+    if HTTP_CACHE_S_MAXAGE is not None:
+        directives.append(f"s-maxage={int(HTTP_CACHE_S_MAXAGE)}")
+    if HTTP_CACHE_STALE_WHILE_REVALIDATE is not None:
+        directives.append(f"stale-while-revalidate={int(HTTP_CACHE_STALE_WHILE_REVALIDATE)}")
+    return ", ".join(directives)
+
+
+CACHE_CONTROL = cache_control()
+
+
+def compute_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag.
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so a
+    W/ prefix added by a proxy, or by compression, still matches.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    etag = etag.removeprefix("W/")
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def conditional_response(request: Request, body: bytes, headers: dict) -> Response:
+    """
+    Build a JSON response, or a 304 when the client already has this body.
+
+    Args:
+        request: The request being answered
+        body: The rendered JSON body
+        headers: Response headers, including the body's ETag
+
+    Returns:
+        Response: 304 Not Modified or 200 with the body
+    """
+    headers = {**headers, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
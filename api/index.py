@@ -1,9 +1,21 @@
 from typing import List, Optional
 
-from dependencies import api_client_only, browser_only, get_client_info, get_db
+from aggregates import catalog_stats
+from batch import router as batch_router
+from builds import router as builds_router
+from bulk import bulk_upsert, openapi_body
+from cache import cache_response, cached_response, catalog_cache
+from compression import CompressionMiddleware
+from database import created_engines, start_warm_up
+from dependencies import api_client_only, browser_only, get_client_info, get_db, internal_only
+from export import router as export_router
 from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from fastapi.routing import APIRoute
+from loaders import warframe_options
 from mangum import Mangum
+from metrics import MetricsMiddleware, render_metrics
 from models import (
     Ability,
     AbilityCreate,
@@ -14,11 +26,17 @@ from models import (
     Weapon,
     WeaponCreate,
 )
-from schemas import AbilityResponse, ModResponse, WarframeResponse, WeaponResponse
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
-from starlette.middleware.base import BaseHTTPMiddleware
-from utils import is_browser
+from pagination import NEXT_CURSOR_HEADER, paginate, set_next_cursor, sort_column
+from pooling import pool_stats
+from profiling import ProfilerMiddleware
+from schemas import AbilityResponse, BulkResponse, ModResponse, WarframeResponse, WeaponResponse
+from search import router as search_router
+from serializers import fetch_all, parse_fields
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.types import ASGIApp, Receive, Scope, Send
+from utils import classify_user_agent
+from weapon_stats import router as weapon_stats_router
 
 # FastAPI app
 app = FastAPI(title="Warframe API", description="API for Warframe game data")
@@ -30,22 +48,46 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Server-Timing"],
 )
 
-# Client type detection middleware
-class ClientDetectionMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Get User-Agent
-        user_agent = request.headers.get("User-Agent", "")
-        # Add client_type to request state
-        request.state.is_browser = is_browser(user_agent)
-        request.state.user_agent = user_agent
+# Client type detection middleware. A plain ASGI middleware: it only fills
+# in the request state and passes the response through untouched.
+class ClientDetectionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] in ("http", "websocket"):
+            # Get User-Agent
+            user_agent = ""
+            for name, value in scope["headers"]:
+                if name == b"user-agent":
+                    user_agent = value.decode("latin-1")
+                    break
+            # Add client_type to request state, classified once for the request
+            info = classify_user_agent(user_agent)
+            state = scope.setdefault("state", {})
+            state["client"] = info
+            state["is_browser"] = info.is_browser
+            state["user_agent"] = user_agent
         # Continue processing the request
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
 
 # Add the middleware to the app
 app.add_middleware(ClientDetectionMiddleware)
+# Admin-only, per request: X-Profile header or ?profile= query parameter
+app.add_middleware(ProfilerMiddleware)
+# Negotiated gzip/br/zstd for responses the routes did not compress
+app.add_middleware(CompressionMiddleware)
+# Added last so it wraps everything else and times the whole request
+app.add_middleware(MetricsMiddleware)
+
+# Mangum runs the startup event on every invocation; only the first one
+# starts the warm-up
+@app.on_event("startup")
+async def warm_up_database():
+    start_warm_up()
 
 # Example route that behaves differently based on client type
 @app.get("/")
@@ -89,25 +131,29 @@ def read_root(request: Request):
 
 # Example of a browser-only endpoint
 @app.get("/browser-dashboard", dependencies=[Depends(browser_only)])
-def browser_dashboard():
+async def browser_dashboard(db: AsyncSession = Depends(get_db)):
     """This endpoint can only be accessed by browsers"""
+    stats = await catalog_stats(db)
     return {
         "message": "This is a browser-only dashboard",
         "data": {
-            "warframes_count": 42,
-            "weapons_count": 137,
-            "mods_count": 312
+            "warframes_count": stats["warframes"]["count"],
+            "weapons_count": stats["weapons"]["count"],
+            "mods_count": stats["mods"]["count"],
+            "weapons_by_type": stats["weapons"]["by_type"],
+            "mods_by_rarity": stats["mods"]["by_rarity"],
         }
     }
 
 # Example of an API-client-only endpoint
 @app.get("/api-stats", dependencies=[Depends(api_client_only)])
-def api_stats():
+async def api_stats(db: AsyncSession = Depends(get_db)):
     """This endpoint can only be accessed by API clients"""
     return {
         "api_version": "1.0.0",
         "rate_limit": 100,
-        "endpoints_count": 15
+        "endpoints_count": sum(isinstance(route, APIRoute) for route in app.routes),
+        "catalog": await catalog_stats(db),
     }
 
 # Example of an endpoint that adapts to client type
@@ -118,138 +164,280 @@ def adaptive_endpoint(client_info: dict = Depends(get_client_info)):
     else:
         return {"message": "Hello API User!", "client": "api"}
 
+# Internal endpoints, only reachable with the admin token
+@app.get("/internal/pool", dependencies=[Depends(internal_only)], tags=["Internal"])
+def pool_status():
+    """Connection pool usage for the engines this process has created"""
+    return {
+        kind: pool_stats(engine.pool if kind == "sync" else engine.sync_engine.pool)
+        for kind, engine in created_engines().items()
+    }
+
+@app.get("/metrics", dependencies=[Depends(internal_only)], response_class=PlainTextResponse, tags=["Internal"])
+def metrics():
+    """Per-route latency, query count, DB and serialization time histograms (Prometheus format)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/internal/cache", dependencies=[Depends(internal_only)], tags=["Internal"])
+def cache_status():
+    """Hit, miss and eviction counters of the catalog read cache"""
+    return catalog_cache.stats()
+
+# Batch lookups by id or name and weapon rankings. Included before the
+# /{id} routes, which would otherwise capture GET /weapons/batch or
+# /weapons/ranking and answer 422.
+app.include_router(batch_router)
+app.include_router(weapon_stats_router)
+
 # Warframe endpoints
 @app.post("/warframes/", response_model=WarframeResponse, tags=["Warframes"])
-def create_warframe(warframe: WarframeCreate, db: Session = Depends(get_db)):
+async def create_warframe(warframe: WarframeCreate, db: AsyncSession = Depends(get_db)):
     db_warframe = Warframe(**warframe.dict())
     db.add(db_warframe)
-    db.commit()
-    db.refresh(db_warframe)
+    await db.commit()
+    await catalog_cache.invalidate("warframes")
+    await db.refresh(db_warframe, ["abilities"])
     return db_warframe
 
+@app.post("/warframes/bulk", response_model=BulkResponse, tags=["Warframes"], openapi_extra=openapi_body("WarframeCreate"))
+async def bulk_upsert_warframes(request: Request, db: AsyncSession = Depends(get_db)):
+    """Create or update many warframes by name in one transaction (JSON array or NDJSON body)"""
+    result = await bulk_upsert(db, request, Warframe, WarframeCreate)
+    await catalog_cache.invalidate("warframes")
+    return ORJSONResponse(result)
+
 @app.get("/warframes/", response_model=List[WarframeResponse], tags=["Warframes"])
-def read_warframes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    warframes = db.query(Warframe).offset(skip).limit(limit).all()
-    return warframes
+async def read_warframes(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    sort: Optional[str] = Query(None, description="Column to sort by, prefix with - for descending order"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name; id is always included"),
+    include_abilities: bool = Query(True, description="Set to false to skip loading abilities"),
+    db: AsyncSession = Depends(get_db)
+):
+    cached = await cached_response(request, ("warframes", "abilities"))
+    if cached is not None:
+        return cached
+    selected = parse_fields(WarframeResponse, fields)
+    query = select(Warframe).options(*warframe_options(include_abilities))
+    query = paginate(query, Warframe, limit, skip=skip, cursor=cursor, sort=sort)
+    relationships = ("abilities",) if include_abilities else ()
+    warframes = await fetch_all(
+        db, query, Warframe, WarframeResponse, relationships, fields=selected, extra=[sort_column(sort)]
+    )
+    headers = {}
+    set_next_cursor(headers, warframes, limit, sort)
+    return await cache_response(request, List[WarframeResponse], warframes, headers, fields=selected)
 
 @app.get("/warframes/{warframe_id}", response_model=WarframeResponse, tags=["Warframes"])
-def read_warframe(warframe_id: int, db: Session = Depends(get_db)):
-    db_warframe = db.query(Warframe).filter(Warframe.id == warframe_id).first()
+async def read_warframe(
+    request: Request,
+    warframe_id: int,
+    include_abilities: bool = Query(True, description="Set to false to skip loading abilities"),
+    db: AsyncSession = Depends(get_db)
+):
+    cached = await cached_response(request, ("warframes", "abilities"))
+    if cached is not None:
+        return cached
+    db_warframe = await db.get(Warframe, warframe_id, options=warframe_options(include_abilities))
     if db_warframe is None:
         raise HTTPException(status_code=404, detail="Warframe not found")
-    return db_warframe
+    return await cache_response(request, WarframeResponse, db_warframe)
 
 @app.put("/warframes/{warframe_id}", response_model=WarframeResponse, tags=["Warframes"])
-def update_warframe(warframe_id: int, warframe: WarframeCreate, db: Session = Depends(get_db)):
-    db_warframe = db.query(Warframe).filter(Warframe.id == warframe_id).first()
+async def update_warframe(warframe_id: int, warframe: WarframeCreate, db: AsyncSession = Depends(get_db)):
+    db_warframe = await db.get(Warframe, warframe_id, options=warframe_options())
     if db_warframe is None:
         raise HTTPException(status_code=404, detail="Warframe not found")
     
     for key, value in warframe.dict().items():
         setattr(db_warframe, key, value)
     
-    db.commit()
-    db.refresh(db_warframe)
+    await db.commit()
+    await catalog_cache.invalidate("warframes")
+    await db.refresh(db_warframe)
     return db_warframe
 
 @app.delete("/warframes/{warframe_id}", tags=["Warframes"])
-def delete_warframe(warframe_id: int, db: Session = Depends(get_db)):
-    db_warframe = db.query(Warframe).filter(Warframe.id == warframe_id).first()
+async def delete_warframe(warframe_id: int, db: AsyncSession = Depends(get_db)):
+    db_warframe = await db.get(Warframe, warframe_id)
     if db_warframe is None:
         raise HTTPException(status_code=404, detail="Warframe not found")
     
-    db.delete(db_warframe)
-    db.commit()
+    await db.delete(db_warframe)
+    await db.commit()
+    await catalog_cache.invalidate("warframes")
     return {"message": "Warframe deleted successfully"}
 
 # Ability endpoints
 @app.post("/abilities/", response_model=AbilityResponse, tags=["Abilities"])
-def create_ability(ability: AbilityCreate, db: Session = Depends(get_db)):
+async def create_ability(ability: AbilityCreate, db: AsyncSession = Depends(get_db)):
     db_ability = Ability(**ability.dict())
     db.add(db_ability)
-    db.commit()
-    db.refresh(db_ability)
+    await db.commit()
+    await catalog_cache.invalidate("abilities")
+    await db.refresh(db_ability)
     return db_ability
 
+@app.post("/abilities/bulk", response_model=BulkResponse, tags=["Abilities"], openapi_extra=openapi_body("AbilityCreate"))
+async def bulk_upsert_abilities(request: Request, db: AsyncSession = Depends(get_db)):
+    """Create or update many abilities by name in one transaction (JSON array or NDJSON body)"""
+    result = await bulk_upsert(db, request, Ability, AbilityCreate)
+    await catalog_cache.invalidate("abilities")
+    return ORJSONResponse(result)
+
 @app.get("/abilities/", response_model=List[AbilityResponse], tags=["Abilities"])
-def read_abilities(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    abilities = db.query(Ability).offset(skip).limit(limit).all()
-    return abilities
+async def read_abilities(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    sort: Optional[str] = Query(None, description="Column to sort by, prefix with - for descending order"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name; id is always included"),
+    db: AsyncSession = Depends(get_db)
+):
+    cached = await cached_response(request, ("abilities",))
+    if cached is not None:
+        return cached
+    selected = parse_fields(AbilityResponse, fields)
+    query = paginate(select(Ability), Ability, limit, skip=skip, cursor=cursor, sort=sort)
+    abilities = await fetch_all(db, query, Ability, AbilityResponse, fields=selected, extra=[sort_column(sort)])
+    headers = {}
+    set_next_cursor(headers, abilities, limit, sort)
+    return await cache_response(request, List[AbilityResponse], abilities, headers, fields=selected)
 
 # Weapon endpoints
 @app.post("/weapons/", response_model=WeaponResponse, tags=["Weapons"])
-def create_weapon(weapon: WeaponCreate, db: Session = Depends(get_db)):
+async def create_weapon(weapon: WeaponCreate, db: AsyncSession = Depends(get_db)):
     db_weapon = Weapon(**weapon.dict())
     db.add(db_weapon)
-    db.commit()
-    db.refresh(db_weapon)
+    await db.commit()
+    await catalog_cache.invalidate("weapons")
+    await db.refresh(db_weapon)
     return db_weapon
 
+@app.post("/weapons/bulk", response_model=BulkResponse, tags=["Weapons"], openapi_extra=openapi_body("WeaponCreate"))
+async def bulk_upsert_weapons(request: Request, db: AsyncSession = Depends(get_db)):
+    """Create or update many weapons by name in one transaction (JSON array or NDJSON body)"""
+    result = await bulk_upsert(db, request, Weapon, WeaponCreate)
+    await catalog_cache.invalidate("weapons")
+    return ORJSONResponse(result)
+
 @app.get("/weapons/", response_model=List[WeaponResponse], tags=["Weapons"])
-def read_weapons(
+async def read_weapons(
+    request: Request,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    sort: Optional[str] = Query(None, description="Column to sort by, prefix with - for descending order"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name; id is always included"),
     weapon_type: Optional[str] = Query(None, description="Filter by weapon type (Primary, Secondary, Melee)"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(Weapon)
+    cached = await cached_response(request, ("weapons",))
+    if cached is not None:
+        return cached
+    selected = parse_fields(WeaponResponse, fields)
+    query = select(Weapon)
     if weapon_type:
-        query = query.filter(Weapon.type == weapon_type)
-    weapons = query.offset(skip).limit(limit).all()
-    return weapons
+        query = query.where(Weapon.type == weapon_type)
+    query = paginate(query, Weapon, limit, skip=skip, cursor=cursor, sort=sort)
+    weapons = await fetch_all(db, query, Weapon, WeaponResponse, fields=selected, extra=[sort_column(sort)])
+    headers = {}
+    set_next_cursor(headers, weapons, limit, sort)
+    return await cache_response(request, List[WeaponResponse], weapons, headers, fields=selected)
 
 @app.get("/weapons/{weapon_id}", response_model=WeaponResponse, tags=["Weapons"])
-def read_weapon(weapon_id: int, db: Session = Depends(get_db)):
-    db_weapon = db.query(Weapon).filter(Weapon.id == weapon_id).first()
+async def read_weapon(request: Request, weapon_id: int, db: AsyncSession = Depends(get_db)):
+    cached = await cached_response(request, ("weapons",))
+    if cached is not None:
+        return cached
+    db_weapon = await db.get(Weapon, weapon_id)
     if db_weapon is None:
         raise HTTPException(status_code=404, detail="Weapon not found")
-    return db_weapon
+    return await cache_response(request, WeaponResponse, db_weapon)
 
 # Mod endpoints
 @app.post("/mods/", response_model=ModResponse, tags=["Mods"])
-def create_mod(mod: ModCreate, db: Session = Depends(get_db)):
+async def create_mod(mod: ModCreate, db: AsyncSession = Depends(get_db)):
     db_mod = Mod(**mod.dict())
     db.add(db_mod)
-    db.commit()
-    db.refresh(db_mod)
+    await db.commit()
+    await catalog_cache.invalidate("mods")
+    await db.refresh(db_mod)
     return db_mod
 
+@app.post("/mods/bulk", response_model=BulkResponse, tags=["Mods"], openapi_extra=openapi_body("ModCreate"))
+async def bulk_upsert_mods(request: Request, db: AsyncSession = Depends(get_db)):
+    """Create or update many mods by name in one transaction (JSON array or NDJSON body)"""
+    result = await bulk_upsert(db, request, Mod, ModCreate)
+    await catalog_cache.invalidate("mods")
+    return ORJSONResponse(result)
+
 @app.get("/mods/", response_model=List[ModResponse], tags=["Mods"])
-def read_mods(
+async def read_mods(
+    request: Request,
     skip: int = 0, 
     limit: int = 100, 
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    sort: Optional[str] = Query(None, description="Column to sort by, prefix with - for descending order"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name; id is always included"),
     mod_type: Optional[str] = Query(None, description="Filter by mod type"),
     rarity: Optional[str] = Query(None, description="Filter by rarity"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(Mod)
+    cached = await cached_response(request, ("mods",))
+    if cached is not None:
+        return cached
+    selected = parse_fields(ModResponse, fields)
+    query = select(Mod)
     if mod_type:
-        query = query.filter(Mod.type == mod_type)
+        query = query.where(Mod.type == mod_type)
     if rarity:
-        query = query.filter(Mod.rarity == rarity)
-    mods = query.offset(skip).limit(limit).all()
-    return mods
+        query = query.where(Mod.rarity == rarity)
+    query = paginate(query, Mod, limit, skip=skip, cursor=cursor, sort=sort)
+    mods = await fetch_all(db, query, Mod, ModResponse, fields=selected, extra=[sort_column(sort)])
+    headers = {}
+    set_next_cursor(headers, mods, limit, sort)
+    return await cache_response(request, List[ModResponse], mods, headers, fields=selected)
 
 @app.get("/mods/{mod_id}", response_model=ModResponse, tags=["Mods"])
-def read_mod(mod_id: int, db: Session = Depends(get_db)):
-    db_mod = db.query(Mod).filter(Mod.id == mod_id).first()
+async def read_mod(request: Request, mod_id: int, db: AsyncSession = Depends(get_db)):
+    cached = await cached_response(request, ("mods",))
+    if cached is not None:
+        return cached
+    db_mod = await db.get(Mod, mod_id)
     if db_mod is None:
         raise HTTPException(status_code=404, detail="Mod not found")
-    return db_mod
+    return await cache_response(request, ModResponse, db_mod)
+
+# Streaming exports of the whole catalog
+app.include_router(export_router)
+
+# Name search across every catalog table
+app.include_router(search_router)
+
+# Mod sets applied to a weapon or warframe
+app.include_router(builds_router)
 
 # Add ability to warframe
 @app.post("/warframes/{warframe_id}/abilities/{ability_id}", tags=["Warframes"])
-def add_ability_to_warframe(warframe_id: int, ability_id: int, db: Session = Depends(get_db)):
-    db_warframe = db.query(Warframe).filter(Warframe.id == warframe_id).first()
+async def add_ability_to_warframe(warframe_id: int, ability_id: int, db: AsyncSession = Depends(get_db)):
+    db_warframe = await db.get(Warframe, warframe_id, options=warframe_options())
     if db_warframe is None:
         raise HTTPException(status_code=404, detail="Warframe not found")
         
-    db_ability = db.query(Ability).filter(Ability.id == ability_id).first()
+    db_ability = await db.get(Ability, ability_id)
     if db_ability is None:
         raise HTTPException(status_code=404, detail="Ability not found")
     
-    db_warframe.abilities.append(db_ability)
-    db.commit()
+    # Each pair is the link table's primary key, so adding one twice is a no-op
+    if db_ability not in db_warframe.abilities:
+        db_warframe.abilities.append(db_ability)
+        await db.commit()
+        await catalog_cache.invalidate("warframes")
     return {"message": "Ability added to warframe successfully"}
 
 # Create handler for AWS Lambda (required for Vercel)
@@ -0,0 +1,40 @@
+import os
+
+from sqlalchemy.orm import joinedload, lazyload, noload, selectinload
+
+from database import DATABASE_ASYNC
+from models import Warframe
+
+# Loading strategy for relationships serialized in responses.
+# "selectin" issues one extra IN query per page, "joined" folds the
+# relationship into the main query and "lazy" restores per-row loading
+# (only possible with DATABASE_ASYNC=0, async sessions cannot lazy load).
+RELATIONSHIP_LOADING = os.environ.get("RELATIONSHIP_LOADING", "selectin")
+if RELATIONSHIP_LOADING == "lazy" and DATABASE_ASYNC:
+    raise ValueError("RELATIONSHIP_LOADING=lazy requires DATABASE_ASYNC=0")
+
+_STRATEGIES = {
+    "selectin": selectinload,
+    "joined": joinedload,
+    "lazy": lazyload,
+}
+
+
+def warframe_options(include_abilities: bool = True):
+    """
+    Build loader options for queries returning WarframeResponse objects.
+
+    Args:
+        include_abilities: When False, abilities are not loaded at all and
+            serialize as an empty list
+
+    Returns:
+        list: Options to pass to Query.options()
+    """
+    if not include_abilities:
+        return [noload(Warframe.abilities)]
+    try:
+        strategy = _STRATEGIES[RELATIONSHIP_LOADING]
+    except KeyError:
+        raise ValueError(f"Unknown RELATIONSHIP_LOADING strategy: {RELATIONSHIP_LOADING}")
+    return [strategy(Warframe.abilities)]
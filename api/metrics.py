@@ -0,0 +1,252 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger("warframe_api.requests")
+slow_query_logger = logging.getLogger("warframe_api.slow_queries")
+
+# Per-request timing: total latency, SQL statements, DB time and
+# serialization time, reported in a Server-Timing header, a JSON log line on
+# the "warframe_api.requests" logger and per-route histograms at /metrics.
+# Histograms live in process memory, so each instance reports its own.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "1").lower() not in ("0", "false", "no")
+
+# Statements slower than this are logged with their SQL, parameters and the
+# route that issued them on the "warframe_api.slow_queries" logger. Set
+# SLOW_QUERY_MS=0 to turn the log off.
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+# Longest parameter repr written to the slow query log
+SLOW_QUERY_MAX_PARAMS = int(os.environ.get("SLOW_QUERY_MAX_PARAMS", "1000"))
+
+# Upper bounds of the histogram buckets, in seconds and in statements
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+class RequestMetrics:
+    """Counters for the request being handled"""
+
+    __slots__ = ("scope", "start", "queries", "db_time", "serialize_time")
+
+    def __init__(self, scope: Optional[Scope] = None):
+        self.scope = scope
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+
+# Context variables are copied into the threadpool and into SQLAlchemy's
+# greenlets, so the hooks below find the request they are running for
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+@contextmanager
+def timed_serialization():
+    """Add the time spent in the block to the request's serialization time"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialize_time += time.perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.queries += 1
+        metrics.db_time += duration
+    if SLOW_QUERY_MS and duration * 1000 >= SLOW_QUERY_MS:
+        log_slow_query(statement, parameters, executemany, duration, metrics)
+
+
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; drop its start
+    # time, or it would stay on the pooled connection's stack for good
+    if context.connection is not None:
+        starts = context.connection.info.get("query_start")
+        if starts:
+            starts.pop()
+
+
+def log_slow_query(statement: str, parameters, executemany: bool, duration: float, metrics: Optional[RequestMetrics]):
+    scope = metrics.scope if metrics is not None else None
+    params = repr(parameters)
+    if len(params) > SLOW_QUERY_MAX_PARAMS:
+        params = params[:SLOW_QUERY_MAX_PARAMS] + "..."
+    slow_query_logger.warning(json.dumps({
+        "duration_ms": round(duration * 1000, 3),
+        "route": route_path(scope) if scope else None,
+        "method": scope["method"] if scope else None,
+        "path": scope["path"] if scope else None,
+        "statement": " ".join(statement.split()),
+        "parameters": params,
+        "executemany": executemany,
+    }))
+
+
+def instrument_engine(engine):
+    """
+    Count the statements run on an engine and time them against the current request.
+
+    Args:
+        engine: A sync Engine, or the sync_engine of an AsyncEngine
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram with one series per label set"""
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Bucket counts, then the +Inf count and the sum
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self, label_names: Tuple[str, ...]) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for labels, values in series:
+            label_text = ",".join(f'{name}="{value}"' for name, value in zip(label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            cumulative += values[-2]
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {values[-1]}")
+            lines.append(f"{self.name}_count{{{label_text}}} {cumulative}")
+        return "\n".join(lines)
+
+
+LABELS = ("method", "route")
+HISTOGRAMS = {
+    "duration": Histogram("http_request_duration_seconds", "Request latency", LATENCY_BUCKETS),
+    "queries": Histogram("http_request_db_queries", "SQL statements per request", QUERY_BUCKETS),
+    "db": Histogram("http_request_db_seconds", "Time spent in SQL statements", LATENCY_BUCKETS),
+    "serialize": Histogram("http_request_serialize_seconds", "Time spent serializing responses", LATENCY_BUCKETS),
+}
+
+
+def render_metrics() -> str:
+    """All histograms in the Prometheus text exposition format"""
+    return "\n".join(histogram.render(LABELS) for histogram in HISTOGRAMS.values()) + "\n"
+
+
+_route_paths: Dict[object, str] = {}
+
+
+def route_path(scope: Scope) -> str:
+    """Path template of the route that handles a request, e.g. /weapons/{weapon_id}"""
+    if not _route_paths:
+        _route_paths.update(
+            (route.endpoint, route.path) for route in scope["app"].routes if hasattr(route, "endpoint")
+        )
+    return _route_paths.get(scope.get("endpoint"), "unmatched")
+
+
+def server_timing(metrics: RequestMetrics) -> str:
+    return (
+        f"db;dur={metrics.db_time * 1000:.2f};desc=\"{metrics.queries} queries\", "
+        f"serialize;dur={metrics.serialize_time * 1000:.2f}, "
+        f"total;dur={metrics.elapsed * 1000:.2f}"
+    )
+
+
+class MetricsMiddleware:
+    """
+    Time every HTTP request.
+
+    The Server-Timing header is added when the response starts, so for
+    streamed responses it only covers the work done before the first chunk.
+    The log line and the histograms use the time until the last chunk.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics(scope)
+        token = _current.set(metrics)
+        status = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if SERVER_TIMING:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(metrics).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self.record(scope, status, metrics)
+
+    def record(self, scope: Scope, status: int, metrics: RequestMetrics):
+        elapsed = metrics.elapsed
+        labels = (scope["method"], route_path(scope))
+        HISTOGRAMS["duration"].observe(labels, elapsed)
+        HISTOGRAMS["queries"].observe(labels, metrics.queries)
+        HISTOGRAMS["db"].observe(labels, metrics.db_time)
+        HISTOGRAMS["serialize"].observe(labels, metrics.serialize_time)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": labels[1],
+                "status": status,
+                "duration_ms": round(elapsed * 1000, 3),
+                "db_queries": metrics.queries,
+                "db_ms": round(metrics.db_time * 1000, 3),
+                "serialize_ms": round(metrics.serialize_time * 1000, 3),
+            }))
@@ -0,0 +1,116 @@
+"""
+Bring an existing database up to the schema declared in models.py.
+
+create_all() only creates missing tables, so indexes and keys added to the
+models after a table exists never reach it. migrate() creates missing
+tables, gives warframe_ability its composite primary key (dropping duplicate
+and half-empty links first) and creates any missing index. On PostgreSQL it
+also enables pg_trgm and adds the trigram indexes behind /search. Each step
+checks the live schema first, so it is safe to rerun.
+
+    python api/migrations.py
+"""
+import logging
+from typing import List
+
+from sqlalchemy import inspect, text
+
+from models import Base, warframe_ability
+
+logger = logging.getLogger(__name__)
+
+# Tables whose names get a GIN trigram index on PostgreSQL, for /search
+TRIGRAM_INDEXED_TABLES = ("warframes", "abilities", "weapons", "mods")
+
+
+def missing_indexes(connection) -> list:
+    """Indexes declared on the models that the database does not have"""
+    inspector = inspect(connection)
+    missing = []
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing += [index for index in table.indexes if index.name not in existing]
+    return missing
+
+
+def add_association_key(connection):
+    """Deduplicate the warframe/ability links and make the pair the primary key"""
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("DELETE FROM warframe_ability WHERE warframe_id IS NULL OR ability_id IS NULL"))
+        connection.execute(text(
+            "DELETE FROM warframe_ability a USING warframe_ability b "
+            "WHERE a.ctid > b.ctid AND a.warframe_id = b.warframe_id AND a.ability_id = b.ability_id"
+        ))
+        connection.execute(text("ALTER TABLE warframe_ability ADD PRIMARY KEY (warframe_id, ability_id)"))
+        return
+    # SQLite cannot add a primary key to an existing table, so rebuild it
+    connection.execute(text("ALTER TABLE warframe_ability RENAME TO warframe_ability_old"))
+    warframe_ability.create(connection)
+    connection.execute(text(
+        "INSERT INTO warframe_ability (warframe_id, ability_id) "
+        "SELECT DISTINCT warframe_id, ability_id FROM warframe_ability_old "
+        "WHERE warframe_id IS NOT NULL AND ability_id IS NOT NULL"
+    ))
+    connection.execute(text("DROP TABLE warframe_ability_old"))
+
+
+def add_trigram_indexes(connection) -> List[str]:
+    """Enable pg_trgm and index every searchable name column with gin_trgm_ops"""
+    applied = []
+    if connection.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is None:
+        connection.execute(text("CREATE EXTENSION pg_trgm"))
+        applied.append("enabled extension pg_trgm")
+    inspector = inspect(connection)
+    for table in TRIGRAM_INDEXED_TABLES:
+        name = f"ix_{table}_name_trgm"
+        if name not in {index["name"] for index in inspector.get_indexes(table)}:
+            connection.execute(text(f"CREATE INDEX {name} ON {table} USING gin (name gin_trgm_ops)"))
+            applied.append(f"created index {name}")
+    return applied
+
+
+def migrate(bind) -> List[str]:
+    """
+    Apply every pending schema change in one transaction.
+
+    Args:
+        bind: The sync engine to migrate
+
+    Returns:
+        list: Description of each change made, empty when up to date
+    """
+    applied = []
+    with bind.begin() as connection:
+        existing = set(inspect(connection).get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                table.create(connection)
+                applied.append(f"created table {table.name}")
+
+        if not inspect(connection).get_pk_constraint(warframe_ability.name)["constrained_columns"]:
+            # Before the indexes: the SQLite rebuild creates the table's own
+            add_association_key(connection)
+            applied.append(f"added primary key to {warframe_ability.name}")
+
+        for index in missing_indexes(connection):
+            index.create(connection)
+            applied.append(f"created index {index.name}")
+
+        if connection.dialect.name == "postgresql":
+            applied += add_trigram_indexes(connection)
+
+    for change in applied:
+        logger.info("Migration: %s", change)
+    return applied
+
+
+def main():
+    from database import get_engine
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not migrate(get_engine()):
+        print("Schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Tuple
+
+# Stat names found in mod effects, mapped to the column they modify
+STAT_ALIASES = {
+    "damage": "damage",
+    "base damage": "damage",
+    "critical chance": "critical_chance",
+    "crit chance": "critical_chance",
+    "critical damage": "critical_multiplier",
+    "critical multiplier": "critical_multiplier",
+    "crit damage": "critical_multiplier",
+    "status chance": "status_chance",
+    "health": "health",
+    "shield": "shield",
+    "shields": "shield",
+    "shield capacity": "shield",
+    "armor": "armor",
+    "energy": "energy",
+    "energy max": "energy",
+}
+
+# One clause of an effect, with the value before or after the stat:
+# "Damage +15%", "+15% Damage", "Armor +50", "-30% Energy"
+_NUMBER = r"(?P<sign{n}>[+-])\s*(?P<value{n}>\d+(?:\.\d+)?)\s*(?P<percent{n}>%)?"
+CLAUSE = re.compile(
+    rf"^(?:{_NUMBER.format(n=1)}\s+(?P<stat1>[a-z][a-z ]*?)|(?P<stat2>[a-z][a-z ]*?)\s+{_NUMBER.format(n=2)})$",
+    re.IGNORECASE,
+)
+CLAUSE_SEPARATORS = re.compile(r"[,;\n]")
+
+
+class Modifier(NamedTuple):
+    stat: str
+    # "percent" scales the base stat, "flat" is added after scaling
+    kind: str
+    value: float
+
+
+@lru_cache(maxsize=4096)
+def parse_effect(effect: str) -> Tuple[Tuple[Modifier, ...], Tuple[str, ...]]:
+    """
+    Compile a mod effect string into modifiers.
+
+    Clauses are separated by commas, semicolons or new lines. Each effect
+    string is parsed once per process; mods sharing an effect share the
+    result.
+
+    Returns:
+        tuple: The modifiers, and the clauses that could not be read
+    """
+    modifiers, unparsed = [], []
+    for clause in CLAUSE_SEPARATORS.split(effect or ""):
+        clause = " ".join(clause.split())
+        if not clause:
+            continue
+        match = CLAUSE.match(clause)
+        n = "1" if match and match["stat1"] else "2"
+        stat = STAT_ALIASES.get(match[f"stat{n}"].lower()) if match else None
+        if stat is None:
+            unparsed.append(clause)
+            continue
+        value = float(match[f"value{n}"])
+        modifiers.append(Modifier(
+            stat=stat,
+            kind="percent" if match[f"percent{n}"] else "flat",
+            value=-value if match[f"sign{n}"] == "-" else value,
+        ))
+    return tuple(modifiers), tuple(unparsed)
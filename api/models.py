@@ -1,6 +1,6 @@
 from typing import List
 from pydantic import BaseModel
-from sqlalchemy import Column, Float, ForeignKey, Integer, String, Table, create_engine
+from sqlalchemy import Column, Float, ForeignKey, Index, Integer, String, Table, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -10,8 +10,10 @@ Base = declarative_base()
 warframe_ability = Table(
     "warframe_ability",
     Base.metadata,
-    Column("warframe_id", Integer, ForeignKey("warframes.id")),
-    Column("ability_id", Integer, ForeignKey("abilities.id")),
+    Column("warframe_id", Integer, ForeignKey("warframes.id"), primary_key=True),
+    Column("ability_id", Integer, ForeignKey("abilities.id"), primary_key=True),
+    # The primary key serves lookups by warframe; this one lookups by ability
+    Index("ix_warframe_ability_ability_id", "ability_id"),
 )
 
 
@@ -57,6 +59,10 @@ class Weapon(Base):
     status_chance = Column(Float)
     description = Column(String)
 
+    # List filters are paged in id order, so the filter column is followed by
+    # id: the index finds the matching rows already sorted for the cursor
+    __table_args__ = (Index("ix_weapons_type_id", "type", "id"),)
+
 
 class Mod(Base):
     __tablename__ = "mods"
@@ -69,6 +75,11 @@ class Mod(Base):
     description = Column(String)
     effect = Column(String)
 
+    __table_args__ = (
+        Index("ix_mods_type_id", "type", "id"),
+        Index("ix_mods_rarity_id", "rarity", "id"),
+    )
+
 
 # Pydantic models for request/response
 class AbilityBase(BaseModel):
@@ -0,0 +1,134 @@
+import base64
+import json
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, tuple_
+
+# Columns list endpoints may sort by, per table. Every order is made total
+# by appending the primary key, which is what cursors are keyed on. The stat
+# columns are nullable: NULLs sort after every value in ascending order and
+# before every value in descending order, PostgreSQL's default and the order
+# its indexes are read in either way.
+SORTABLE_COLUMNS = {
+    "warframes": ("id", "name", "health", "shield", "armor", "energy"),
+    "abilities": ("id", "name", "energy_cost"),
+    "weapons": ("id", "name", "type", "damage", "critical_chance", "critical_multiplier", "status_chance"),
+    "mods": ("id", "name", "type", "rarity", "drain"),
+}
+
+# Response header carrying the cursor for the following page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort: str, row) -> str:
+    """
+    Build the opaque cursor pointing just past a row.
+
+    Args:
+        sort: The sort parameter the page was requested with
+        row: The last row of the page, an ORM object or a dict
+
+    Returns:
+        str: URL-safe cursor string
+    """
+    column = sort_column(sort)
+    if isinstance(row, dict):
+        value, row_id = row[column], row["id"]
+    else:
+        value, row_id = getattr(row, column), row.id
+    payload = json.dumps([sort, value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def sort_column(sort: Optional[str]) -> str:
+    """Column a sort parameter orders by"""
+    return (sort or "id").lstrip("-")
+
+
+def decode_cursor(cursor: str, sort: str):
+    """Return the (sort value, id) pair stored in a cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor was issued for a different sort order")
+    return value, last_id
+
+
+def paginate(query, model, limit: int, skip: int = 0, cursor: Optional[str] = None, sort: Optional[str] = None):
+    """
+    Order and page a select() over a model.
+
+    With a cursor the page starts right after the row it points to, using an
+    index-friendly (column, id) comparison instead of OFFSET, so deep pages
+    cost the same as the first one. Without a cursor, skip is applied as an
+    offset for backward compatibility.
+
+    Args:
+        query: The select() to page
+        model: The mapped class being listed
+        limit: Maximum number of rows in the page
+        skip: Offset used when no cursor is given
+        cursor: Cursor returned with the previous page
+        sort: Column to sort by, prefixed with "-" for descending order
+
+    Returns:
+        The ordered and limited select()
+    """
+    sort = sort or "id"
+    column_name = sort_column(sort)
+    if column_name not in SORTABLE_COLUMNS[model.__tablename__]:
+        raise HTTPException(status_code=400, detail=f"Cannot sort by {column_name!r}")
+    descending = sort.startswith("-")
+    column = getattr(model, column_name)
+
+    if column_name == "id":
+        order = [model.id.desc() if descending else model.id]
+    elif descending:
+        order = [column.desc().nulls_first(), model.id.desc()]
+    else:
+        order = [column.asc().nulls_last(), model.id]
+    query = query.order_by(*order)
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        query = query.where(after_cursor(model, column, value, last_id, descending))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def after_cursor(model, column, value, last_id, descending: bool):
+    """
+    Condition selecting the rows ordered after (value, last_id).
+
+    A (column, id) tuple comparison is NULL whenever the column is, so the
+    NULL rows get their own branch: walking towards them they all follow
+    any value, and among themselves they are ordered by id alone.
+    """
+    if column is model.id:
+        return model.id < last_id if descending else model.id > last_id
+    if value is None:
+        same = and_(column.is_(None), model.id < last_id if descending else model.id > last_id)
+        # Descending, the NULLs come first and every value follows them
+        return or_(same, column.is_not(None)) if descending else same
+    if descending:
+        return tuple_(column, model.id) < tuple_(value, last_id)
+    return or_(tuple_(column, model.id) > tuple_(value, last_id), column.is_(None))
+
+
+def next_cursor(rows, limit: int, sort: Optional[str] = None) -> Optional[str]:
+    """Cursor for the page after rows, or None when it was the last page"""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(sort or "id", rows[-1])
+
+
+def set_next_cursor(headers, rows, limit: int, sort: Optional[str] = None):
+    """Advertise the cursor of the following page in a headers mapping"""
+    cursor = next_cursor(rows, limit, sort)
+    if cursor:
+        headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,89 @@
+import os
+import time
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+# "null" opens a fresh connection per checkout and is meant for serverless
+# deployments behind pgbouncer, where the pooler owns the connections.
+# "queue" keeps a sized pool per process for long-running uvicorn workers.
+DB_POOL_MODE = os.environ.get("DB_POOL_MODE", "null" if os.environ.get("VERCEL") else "queue")
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "1").lower() not in ("0", "false", "no")
+
+
+class TimedPoolMixin:
+    """Records how long callers wait to get a connection out of the pool"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+
+class TimedNullPool(TimedPoolMixin, NullPool):
+    pass
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options(is_async: bool = False) -> dict:
+    """
+    Engine keyword arguments for the configured pooling mode.
+
+    Args:
+        is_async: Whether the options are for an asyncio engine
+
+    Returns:
+        dict: Keyword arguments for create_engine()/create_async_engine()
+    """
+    if DB_POOL_MODE == "null":
+        return {"poolclass": TimedNullPool}
+    if DB_POOL_MODE != "queue":
+        raise ValueError(f"Unknown DB_POOL_MODE: {DB_POOL_MODE}")
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def pool_stats(pool) -> dict:
+    """Snapshot of a pool's usage counters"""
+    stats = {
+        "mode": DB_POOL_MODE,
+        "class": type(pool).__name__,
+        "checkouts": getattr(pool, "checkouts", 0),
+        "wait_total_ms": round(getattr(pool, "wait_total", 0.0) * 1000, 3),
+        "wait_max_ms": round(getattr(pool, "wait_max", 0.0) * 1000, 3),
+    }
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    return stats
@@ -0,0 +1,136 @@
+import cProfile
+import marshal
+import os
+import time
+from urllib.parse import parse_qs
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from dependencies import is_admin
+
+# Admin-only switch that profiles a single request and returns the profile
+# in place of the response. Send the admin token in X-Admin-Token and ask for
+# a format in the X-Profile header or the profile query parameter:
+#
+#   speedscope  flamegraph JSON for https://www.speedscope.app (pyinstrument)
+#   html        interactive call tree (pyinstrument)
+#   text        call tree as plain text (pyinstrument)
+#   pstats      cProfile dump, for pstats.Stats or snakeviz
+#
+# pyinstrument samples every PROFILE_INTERVAL seconds; without it installed
+# only pstats is available. Requests without a valid token are served
+# normally, as if the switch did not exist.
+PROFILE_HEADER = b"x-profile"
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.001"))
+PYINSTRUMENT_FORMATS = {
+    "speedscope": "application/json",
+    "html": "text/html; charset=utf-8",
+    "text": "text/plain; charset=utf-8",
+}
+
+
+def requested_format(scope: Scope):
+    """Profile format asked for by an admin request, or None"""
+    headers = dict(scope["headers"])
+    value = headers.get(PROFILE_HEADER, b"").decode("latin-1")
+    if not value:
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        value = query.get("profile", [""])[0]
+    if not value or not is_admin(headers.get(b"x-admin-token", b"").decode("latin-1")):
+        return None
+    if value in ("1", "true"):
+        return "speedscope" if pyinstrument_available() else "pstats"
+    return value
+
+
+def pyinstrument_available() -> bool:
+    try:
+        import pyinstrument  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ProfilerMiddleware:
+    """
+    Run the profiler around one request and answer with its output.
+
+    The handler's own response is discarded; its status and the wall time are
+    returned in X-Profiled-Status and X-Profiled-Duration. cProfile traces
+    every coroutine scheduled on the event loop meanwhile, so profile on a
+    quiet instance when using pstats.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        profile_format = requested_format(scope) if scope["type"] == "http" else None
+        if profile_format is None:
+            await self.app(scope, receive, send)
+            return
+
+        if profile_format == "pstats":
+            run = self.run_cprofile
+        elif profile_format in PYINSTRUMENT_FORMATS and pyinstrument_available():
+            run = self.run_pyinstrument
+        else:
+            available = ["pstats"] + (list(PYINSTRUMENT_FORMATS) if pyinstrument_available() else [])
+            await self.respond(send, 400, "text/plain; charset=utf-8",
+                               f"Unknown profile format, use one of: {', '.join(available)}".encode(), {})
+            return
+
+        status = 500
+
+        async def discard(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        start = time.perf_counter()
+        media_type, body = await run(scope, receive, discard, profile_format)
+        headers = {
+            "x-profiled-status": str(status),
+            "x-profiled-duration": f"{(time.perf_counter() - start) * 1000:.2f}ms",
+        }
+        await self.respond(send, 200, media_type, body, headers)
+
+    async def run_cprofile(self, scope: Scope, receive: Receive, send: Send, profile_format: str):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.disable()
+        profiler.create_stats()
+        # The format pstats.Stats reads back from a file
+        return "application/octet-stream", marshal.dumps(profiler.stats)
+
+    async def run_pyinstrument(self, scope: Scope, receive: Receive, send: Send, profile_format: str):
+        from pyinstrument import Profiler
+        from pyinstrument.renderers import ConsoleRenderer, HTMLRenderer, SpeedscopeRenderer
+
+        profiler = Profiler(interval=PROFILE_INTERVAL, async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+        renderer = {
+            "speedscope": SpeedscopeRenderer,
+            "html": HTMLRenderer,
+            "text": lambda: ConsoleRenderer(unicode=True, color=False),
+        }[profile_format]()
+        output = profiler.output(renderer)
+        return PYINSTRUMENT_FORMATS[profile_format], output.encode("utf-8")
+
+    @staticmethod
+    async def respond(send: Send, status: int, media_type: str, body: bytes, headers: dict):
+        raw_headers = [
+            (b"content-type", media_type.encode("latin-1")),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            (b"cache-control", b"no-store"),
+        ]
+        raw_headers += [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+        await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+        await send({"type": "http.response.body", "body": body})
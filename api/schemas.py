@@ -1,4 +1,8 @@
-from typing import List
+from typing import Any, Dict, Generic, List, Literal, Optional, TypeVar, Union
+
+from pydantic import BaseModel, StrictInt
+from pydantic.generics import GenericModel
+
 from models import WarframeBase, AbilityBase, WeaponBase, ModBase
 
 
@@ -29,3 +33,84 @@ class WarframeResponse(WarframeBase):
 
     class Config:
         orm_mode = True
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    status: str
+    id: Optional[int] = None
+    name: Optional[str] = None
+    errors: Optional[List[Any]] = None
+
+
+class BulkResponse(BaseModel):
+    created: int
+    updated: int
+    duplicate: int
+    invalid: int
+    results: List[BulkItemResult]
+
+
+class SearchResult(BaseModel):
+    type: Literal["warframe", "weapon", "mod", "ability"]
+    id: int
+    name: str
+    score: float
+
+
+class WeaponRank(BaseModel):
+    id: int
+    name: str
+    type: str
+    value: float
+
+
+class WeaponStats(BaseModel):
+    id: int
+    name: str
+    type: str
+    # Per shot; None when a stat the metric needs is missing
+    damage: Optional[float]
+    critical_chance: Optional[float]
+    status_chance: Optional[float]
+    crit_damage: Optional[float]
+    avg_crit_multiplier: Optional[float]
+    avg_damage: Optional[float]
+
+
+class ModModifier(BaseModel):
+    stat: str
+    kind: Literal["percent", "flat"]
+    value: float
+
+
+class ModEffect(BaseModel):
+    id: int
+    name: str
+    modifiers: List[ModModifier]
+    # Clauses of the effect string the parser could not read
+    unparsed: List[str]
+
+
+class BuildResult(BaseModel):
+    # Position of the build in the request
+    index: int
+    mods: List[int]
+    stats: Dict[str, Optional[float]]
+
+
+class BuildEvaluation(BaseModel):
+    target: Literal["weapon", "warframe"]
+    base: Dict[str, Optional[float]]
+    mods: List[ModEffect]
+    missing_mods: List[int]
+    results: List[BuildResult]
+
+
+ItemT = TypeVar("ItemT")
+
+
+class BatchResponse(GenericModel, Generic[ItemT]):
+    items: List[ItemT]
+    # Requested ids or names with no matching row, in request order
+    missing: List[Union[StrictInt, str]]
@@ -0,0 +1,241 @@
+import heapq
+import math
+import os
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from functools import partial
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import case, func, literal, literal_column, or_, select, union_all
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from cache import Materialized, cache_body, cached_response, catalog_cache
+from database import DATABASE_URL
+from dependencies import get_db
+from metrics import timed_serialization
+from models import Ability, Mod, Warframe, Weapon
+from schemas import SearchResult
+from serializers import render_dicts
+
+# Name search across the catalog. On PostgreSQL it runs on pg_trgm trigram
+# indexes (created by migrations.py); elsewhere each process keeps an
+# in-memory inverted index of the names, rebuilt when a write route
+# invalidates the table in the catalog cache or after SEARCH_INDEX_TTL
+# seconds, which also picks up rows loaded outside the API. SEARCH_BACKEND
+# forces "postgres" or "memory".
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND") or (
+    "postgres" if make_url(DATABASE_URL).get_backend_name() == "postgresql" else "memory"
+)
+SEARCH_INDEX_TTL = float(os.environ.get("SEARCH_INDEX_TTL", "300"))
+# Lowest trigram similarity between a query word and a name word that still
+# counts as a typo of it (pg_trgm's default similarity threshold)
+SEARCH_FUZZY_THRESHOLD = float(os.environ.get("SEARCH_FUZZY_THRESHOLD", "0.3"))
+# Most name words a query word is expanded to as a prefix
+SEARCH_MAX_EXPANSIONS = 256
+
+# Result type of each searchable model
+SEARCHABLE = {
+    "warframe": Warframe,
+    "weapon": Weapon,
+    "mod": Mod,
+    "ability": Ability,
+}
+
+WORD = re.compile(r"\w+")
+
+router = APIRouter(tags=["Search"])
+
+
+def words(text: str) -> List[str]:
+    return WORD.findall(text.casefold())
+
+
+def trigrams(word: str) -> set:
+    """Trigrams of a word, padded the way pg_trgm pads them"""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Inverted index over the names of one table.
+
+    Each query word matches the name words it equals (score 1), starts (up to
+    0.9) or, when it is not a name word itself, resembles by trigram
+    similarity (up to 0.7). A name must match
+    every query word; its score is their mean, plus 1 when the whole name
+    starts with the query, as the PostgreSQL ranking does.
+    """
+
+    def __init__(self, rows):
+        self.ids = []
+        self.names = []
+        self.folded = []
+        postings = defaultdict(list)
+        for position, (row_id, name) in enumerate(rows):
+            name = name or ""
+            self.ids.append(row_id)
+            self.names.append(name)
+            self.folded.append(name.casefold())
+            for word in set(words(name)):
+                postings[word].append(position)
+        self.words = sorted(postings)
+        self.postings = [postings[word] for word in self.words]
+        self.trigram_counts = []
+        grams = defaultdict(list)
+        for index, word in enumerate(self.words):
+            word_grams = trigrams(word)
+            self.trigram_counts.append(len(word_grams))
+            for gram in word_grams:
+                grams[gram].append(index)
+        self.grams = dict(grams)
+
+    def match_word(self, token: str) -> Dict[int, float]:
+        """Score of each indexed word matching one query word, by word index"""
+        matches = {}
+        start = bisect_left(self.words, token)
+        for index in range(start, min(start + SEARCH_MAX_EXPANSIONS, len(self.words))):
+            word = self.words[index]
+            if not word.startswith(token):
+                break
+            matches[index] = 1.0 if word == token else 0.7 + 0.2 * len(token) / len(word)
+        # Typos are only looked for when the word itself is not indexed
+        if len(token) >= 3 and self.words[start:start + 1] != [token]:
+            query = trigrams(token)
+            shared = Counter()
+            for gram in query:
+                shared.update(self.grams.get(gram, ()))
+            # A word needs at least this many trigrams in common to reach the
+            # threshold, whatever its length; most_common() sorts in C, so
+            # the many words sharing only one or two are never looked at
+            needed = math.ceil(SEARCH_FUZZY_THRESHOLD * len(query))
+            for index, count in shared.most_common():
+                if count < needed:
+                    break
+                similarity = count / (len(query) + self.trigram_counts[index] - count)
+                if similarity >= SEARCH_FUZZY_THRESHOLD and index not in matches:
+                    matches[index] = 0.7 * similarity
+        return matches
+
+    def search(self, query: str, limit: int) -> List[tuple]:
+        """Best (score, id, name) matches, highest score first"""
+        tokens = words(query)
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            # Lowest scores first, so a name keeps its best matching word
+            for index, score in sorted(self.match_word(token).items(), key=lambda item: item[1]):
+                token_scores.update(dict.fromkeys(self.postings[index], score))
+            if scores is None:
+                scores = token_scores
+            else:
+                if len(token_scores) < len(scores):
+                    scores, token_scores = token_scores, scores
+                scores = {position: score + token_scores[position]
+                          for position, score in scores.items() if position in token_scores}
+            if not scores:
+                return []
+        if scores is None:
+            return []
+        prefix = query.casefold().strip()
+        count = len(tokens)
+        folded = self.folded
+        # Ties go to the shorter name
+        best = heapq.nlargest(limit, (
+            (score / count + (1.0 if folded[position].startswith(prefix) else 0.0), -len(folded[position]), position)
+            for position, score in scores.items()
+        ))
+        return [(round(score, 4), self.ids[position], self.names[position]) for score, _, position in best]
+
+
+async def load_index(result_type: str, db) -> SearchIndex:
+    model = SEARCHABLE[result_type]
+    rows = (await db.execute(select(model.id, model.name))).all()
+    return await run_in_threadpool(SearchIndex, rows)
+
+
+# The in-memory index of each table, rebuilt when stale
+memory_indexes = {
+    result_type: Materialized((model.__tablename__,), SEARCH_INDEX_TTL, partial(load_index, result_type))
+    for result_type, model in SEARCHABLE.items()
+}
+
+
+async def search_memory(db, q: str, types: List[str], limit: int) -> List[dict]:
+    versions = await catalog_cache.versions(SEARCHABLE[result_type].__tablename__ for result_type in types)
+    results = []
+    for result_type, version in zip(types, versions):
+        index = await memory_indexes[result_type].get(db, [version])
+        results += [(score, result_type, row_id, name) for score, row_id, name in index.search(q, limit)]
+    best = heapq.nlargest(limit, results, key=lambda result: (result[0], -len(result[3])))
+    return [{"type": result_type, "id": row_id, "name": name, "score": score}
+            for score, result_type, row_id, name in best]
+
+
+def escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def search_postgres(db, q: str, types: List[str], limit: int) -> List[dict]:
+    """
+    Rank names by pg_trgm word similarity, with prefix matches first.
+
+    `q <% name` and ILIKE 'q%' are both answered by the GIN trigram index
+    on each name column.
+    """
+    pattern = escape_like(q) + "%"
+    selects = []
+    for result_type in types:
+        model = SEARCHABLE[result_type]
+        prefix = model.name.ilike(pattern, escape="\\")
+        # Constants rather than parameters: asyncpg cannot infer their types
+        score = func.word_similarity(q, model.name) + case(
+            (prefix, literal_column("1.0")), else_=literal_column("0.0")
+        )
+        selects.append(
+            select(literal_column(f"'{result_type}'").label("type"), model.id, model.name, score.label("score"))
+            .where(or_(literal(q).op("<%")(model.name), prefix))
+            .order_by(score.desc())
+            .limit(limit)
+        )
+    matches = union_all(*selects).subquery()
+    query = (
+        select(matches)
+        .order_by(matches.c.score.desc(), func.length(matches.c.name), matches.c.name)
+        .limit(limit)
+    )
+    return [
+        {"type": row.type, "id": row.id, "name": row.name, "score": round(float(row.score), 4)}
+        for row in await db.execute(query)
+    ]
+
+
+@router.get("/search", response_model=List[SearchResult])
+async def search(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100, description="Name or part of a name; typos are tolerated"),
+    types: Optional[str] = Query(None, description="Comma-separated result types to search (warframe, weapon, mod, ability)"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """Find warframes, weapons, mods and abilities by name, best matches first"""
+    selected = list(SEARCHABLE) if not types else [name.strip() for name in types.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in SEARCHABLE]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"Unknown result type, use: {', '.join(SEARCHABLE)}")
+    tables = [SEARCHABLE[name].__tablename__ for name in selected]
+    cached = await cached_response(request, tables)
+    if cached is not None:
+        return cached
+    if SEARCH_BACKEND == "postgres":
+        results = await search_postgres(db, q, selected, limit)
+    else:
+        results = await search_memory(db, q, selected, limit)
+    # Plain dicts already shaped like SearchResult, so they skip validation
+    with timed_serialization():
+        body = render_dicts(results)
+    return await cache_body(request, body)
@@ -0,0 +1,263 @@
+"""
+Idempotent bulk loader for the catalog datasets.
+
+Datasets are files named after their table in a data directory, e.g.
+data/weapons.csv or data/mods.ndjson. Records are streamed from disk in
+batches and upserted by name, so reseeding updates rows in place and is safe
+to rerun. On PostgreSQL with psycopg2 each batch goes through COPY into a
+staging table; other databases use executemany upserts.
+
+    python api/seeding.py [data_dir] [--batch-size N]
+"""
+import argparse
+import csv
+import io
+import logging
+import os
+import time
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+import orjson
+from pydantic import validate_model
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from bulk import upsert_by_name
+from migrations import migrate
+from models import (
+    Ability,
+    AbilityCreate,
+    Mod,
+    ModCreate,
+    Warframe,
+    WarframeCreate,
+    Weapon,
+    WeaponCreate,
+    warframe_ability,
+)
+
+logger = logging.getLogger(__name__)
+
+SEED_BATCH_SIZE = int(os.environ.get("SEED_BATCH_SIZE", "5000"))
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# Load order matters: abilities must exist before warframes link to them
+DATASETS = (
+    ("abilities", Ability, AbilityCreate),
+    ("warframes", Warframe, WarframeCreate),
+    ("weapons", Weapon, WeaponCreate),
+    ("mods", Mod, ModCreate),
+)
+EXTENSIONS = (".ndjson", ".jsonl", ".csv", ".json")
+# Separator for list values, such as warframe abilities, in CSV files
+CSV_LIST_SEPARATOR = ";"
+
+
+def find_dataset(data_dir: str, table: str) -> Optional[str]:
+    """Path of the dataset file for a table, if the directory has one"""
+    for extension in EXTENSIONS:
+        path = os.path.join(data_dir, table + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """
+    Stream records from a dataset file.
+
+    NDJSON and CSV files are read line by line. Plain JSON arrays have to be
+    parsed whole, so prefer the other formats for large datasets.
+    """
+    if path.endswith((".ndjson", ".jsonl")):
+        with open(path, "rb") as file:
+            for line in file:
+                if line.strip():
+                    yield orjson.loads(line)
+    elif path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as file:
+            for record in csv.DictReader(file):
+                if "abilities" in record:
+                    names = record["abilities"] or ""
+                    record["abilities"] = [name.strip() for name in names.split(CSV_LIST_SEPARATOR) if name.strip()]
+                yield record
+    else:
+        with open(path, "rb") as file:
+            yield from orjson.loads(file.read())
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def copy_upsert(session: Session, model, rows: List[dict]):
+    """
+    Upsert rows on PostgreSQL through COPY into a temporary staging table.
+
+    Args:
+        session: A Session bound to a psycopg2 engine
+        model: The mapped class
+        rows: Column dicts with distinct names
+    """
+    table = model.__table__.name
+    staging = f"staging_{table}"
+    columns = list(rows[0])
+    column_list = ", ".join(columns)
+
+    buffer = io.StringIO()
+    # Strings are quoted so that only None is read back as NULL
+    csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(
+        [row[column] for column in columns] for row in rows
+    )
+    buffer.seek(0)
+
+    cursor = session.connection().connection.cursor()
+    cursor.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM {table} WITH NO DATA"
+    )
+    cursor.execute(f"TRUNCATE {staging}")
+    cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+    if model.__table__.c.name.unique:
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns if column != "name")
+        cursor.execute(
+            f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} "
+            f"ON CONFLICT (name) DO UPDATE SET {updates}"
+        )
+    else:
+        updates = ", ".join(f"{column} = s.{column}" for column in columns if column != "name")
+        cursor.execute(f"UPDATE {table} t SET {updates} FROM {staging} s WHERE t.name = s.name")
+        cursor.execute(
+            f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} s "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.name = s.name)"
+        )
+
+
+def link_abilities(session: Session, links: dict) -> int:
+    """
+    Attach abilities to warframes by name, skipping links that already exist.
+
+    Args:
+        session: The session
+        links: Warframe name -> list of ability names
+
+    Returns:
+        int: Number of ability names that matched no ability
+    """
+    ability_names = {name for names in links.values() for name in names}
+    warframe_ids = dict(session.execute(select(Warframe.name, Warframe.id).where(Warframe.name.in_(list(links)))).all())
+    # Ability names are not unique; link the oldest ability of each name
+    ability_ids = dict(
+        session.execute(
+            select(Ability.name, Ability.id).where(Ability.name.in_(list(ability_names))).order_by(Ability.id.desc())
+        ).all()
+    )
+
+    wanted = {
+        (warframe_ids[warframe], ability_ids[ability])
+        for warframe, names in links.items()
+        for ability in names
+        if ability in ability_ids
+    }
+    existing = set()
+    if wanted:
+        existing = set(
+            session.execute(
+                select(warframe_ability.c.warframe_id, warframe_ability.c.ability_id).where(
+                    warframe_ability.c.warframe_id.in_(list(warframe_ids.values()))
+                )
+            ).all()
+        )
+    missing = wanted - existing
+    if missing:
+        session.execute(
+            insert(warframe_ability),
+            [{"warframe_id": warframe_id, "ability_id": ability_id} for warframe_id, ability_id in sorted(missing)],
+        )
+    return sum(1 for names in links.values() for name in names if name not in ability_ids)
+
+
+def load_table(session: Session, path: str, model, create_model, batch_size: int = SEED_BATCH_SIZE) -> dict:
+    """
+    Stream one dataset file into its table, committing once at the end.
+
+    Returns:
+        dict: Row counts and throughput for the report
+    """
+    use_copy = session.get_bind().dialect.driver == "psycopg2"
+    stats = {"rows": 0, "invalid": 0, "unresolved_links": 0}
+    start = time.perf_counter()
+
+    for batch in batched(read_records(path), batch_size):
+        rows, links = {}, {}
+        for record in batch:
+            values, _, error = validate_model(create_model, record)
+            if error is not None:
+                stats["invalid"] += 1
+                logger.warning("Skipping invalid %s record %r: %s", model.__tablename__, record.get("name"), error)
+                continue
+            # Last record wins when a name repeats within the batch
+            rows[values["name"]] = values
+            if record.get("abilities"):
+                links[values["name"]] = record["abilities"]
+
+        if rows:
+            if use_copy:
+                copy_upsert(session, model, list(rows.values()))
+            else:
+                upsert_by_name(session, model, list(rows.values()))
+        if links:
+            stats["unresolved_links"] += link_abilities(session, links)
+        stats["rows"] += len(rows)
+
+    session.commit()
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 3)
+    stats["rows_per_second"] = round(stats["rows"] / elapsed) if elapsed else None
+    return stats
+
+
+def seed(bind, data_dir: str = DATA_DIR, batch_size: int = SEED_BATCH_SIZE) -> dict:
+    """
+    Migrate the schema and load every dataset found in data_dir.
+
+    Args:
+        bind: The sync engine to seed
+        data_dir: Directory holding the dataset files
+        batch_size: Records per upsert batch
+
+    Returns:
+        dict: Per-table statistics
+    """
+    migrate(bind)
+    report = {}
+    with Session(bind, autoflush=False) as session:
+        for table, model, create_model in DATASETS:
+            path = find_dataset(data_dir, table)
+            if path is None:
+                continue
+            report[table] = load_table(session, path, model, create_model, batch_size)
+            logger.info("Seeded %s: %s", table, report[table])
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load the catalog datasets into the database")
+    parser.add_argument("data_dir", nargs="?", default=DATA_DIR, help="directory holding the dataset files")
+    parser.add_argument("--batch-size", type=int, default=SEED_BATCH_SIZE, help="records per upsert batch")
+    args = parser.parse_args()
+
+    from database import get_engine
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for table, stats in seed(get_engine(), args.data_dir, args.batch_size).items():
+        print(f"{table:>10}: {stats['rows']} rows in {stats['seconds']}s ({stats['rows_per_second']} rows/s), "
+              f"{stats['invalid']} invalid, {stats['unresolved_links']} unresolved links")
+
+
+if __name__ == "__main__":
+    main()
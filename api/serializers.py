@@ -0,0 +1,173 @@
+import json
+import os
+from typing import Iterable, List, Optional
+
+import orjson
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, parse_obj_as
+from sqlalchemy import select
+
+from metrics import timed_serialization
+
+# Opt-in fast path for list responses: rows are selected as plain column
+# tuples, turned into dicts and encoded with orjson, skipping ORM hydration
+# and per-row Pydantic validation. Output is identical to the default path.
+FAST_RESPONSES = os.environ.get("FAST_RESPONSES", "0").lower() in ("1", "true", "yes")
+
+
+def render_json(content) -> bytes:
+    """Encode content exactly like FastAPI's default JSONResponse"""
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def scalar_fields(response_model) -> List[str]:
+    """Names of the response model's non-nested fields, in output order"""
+    return [
+        name for name, field in response_model.__fields__.items()
+        if not (isinstance(field.type_, type) and issubclass(field.type_, BaseModel))
+    ]
+
+
+def nested_fields(response_model) -> dict:
+    """Map of nested list fields to the response model of their items"""
+    return {
+        name: field.type_ for name, field in response_model.__fields__.items()
+        if isinstance(field.type_, type) and issubclass(field.type_, BaseModel)
+    }
+
+
+def parse_fields(response_model, fields: Optional[str]) -> Optional[List[str]]:
+    """
+    Resolve a comma-separated fields= parameter against a response model.
+
+    Returns:
+        list: The requested fields plus "id", in response model order, or
+        None when no fields were asked for
+    """
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    choices = ", ".join(response_model.__fields__)
+    if not requested:
+        raise HTTPException(status_code=400, detail=f"No fields given; choose from: {choices}")
+    unknown = requested.difference(response_model.__fields__)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}; choose from: {choices}")
+    return [name for name in response_model.__fields__ if name in requested or name == "id"]
+
+
+async def fetch_all(
+    db,
+    query,
+    model,
+    response_model,
+    relationships: Iterable[str] = (),
+    fields: Optional[List[str]] = None,
+    extra: Iterable[str] = (),
+):
+    """
+    Run a list query for a response model.
+
+    In fast mode, or when fields are given, the query is narrowed to the
+    selected columns and rows come back as dicts ordered like the response
+    model, with each relationship in relationships loaded by one extra
+    join query. Otherwise the ORM objects are returned.
+
+    Args:
+        db: The session
+        query: A select() over model, already filtered and paged
+        model: The mapped class being listed
+        response_model: The item response model, e.g. WeaponResponse
+        relationships: Nested fields to load; the others serialize as []
+        fields: Fields from parse_fields(); only their columns are selected
+        extra: Columns to select even when not in fields, e.g. the sort
+            column the next cursor is built from
+
+    Returns:
+        list: ORM objects or dicts
+    """
+    if fields is None and not FAST_RESPONSES:
+        return (await db.scalars(query)).unique().all()
+
+    if fields is None:
+        columns = scalar_fields(response_model)
+    else:
+        nested = nested_fields(response_model)
+        columns = [name for name in fields if name not in nested]
+        columns += [name for name in extra if name not in columns]
+        relationships = [name for name in relationships if name in fields]
+    result = await db.execute(query.with_only_columns(*(getattr(model, name) for name in columns)))
+    items = [dict(zip(columns, row)) for row in result]
+    await attach_relationships(db, model, response_model, items, relationships)
+    return items
+
+
+async def attach_relationships(db, model, response_model, items: list, relationships: Iterable[str] = ()):
+    """
+    Fill the nested list fields of row dicts, one join query per relationship.
+
+    Args:
+        db: The session
+        model: The mapped class the rows were read from
+        response_model: The item response model
+        items: Row dicts holding at least "id"
+        relationships: Nested fields to load; the others are set to []
+    """
+    for name, item_model in nested_fields(response_model).items():
+        for item in items:
+            item[name] = []
+        if name not in relationships or not items:
+            continue
+        by_id = {item["id"]: item for item in items}
+        item_fields = scalar_fields(item_model)
+        target = getattr(model, name).property.mapper.class_
+        related = await db.execute(
+            select(model.id, *(getattr(target, field) for field in item_fields))
+            .join(getattr(model, name))
+            .where(model.id.in_(list(by_id)))
+        )
+        for parent_id, *values in related:
+            by_id[parent_id][name].append(dict(zip(item_fields, values)))
+
+
+def _orjson_exact(items) -> bool:
+    """
+    Whether orjson renders every float in items like json.dumps does.
+
+    Both print the shortest round-trip digits, but they disagree on exponent
+    notation below 1e-4 and from 1e16 up, and on non-finite values.
+    """
+    for item in items:
+        for value in item.values():
+            if type(value) is float:
+                if value and not 1e-4 <= abs(value) < 1e16:
+                    return False
+            elif type(value) is list and not _orjson_exact(value):
+                return False
+    return True
+
+
+def render_dicts(items: list) -> bytes:
+    """Encode a list of plain dicts, with orjson whenever it is byte-exact"""
+    if _orjson_exact(items):
+        return orjson.dumps(items)
+    return render_json(items)
+
+
+def render_body(response_model, data, fields: Optional[List[str]] = None) -> bytes:
+    """
+    Serialize response data to JSON bytes.
+
+    Dicts produced by fetch_all() are encoded directly with orjson; anything
+    else goes through response_model like FastAPI would. With fields, only
+    those keys of each dict are kept.
+    """
+    with timed_serialization():
+        if fields is not None:
+            return render_dicts([{name: item[name] for name in fields} for item in data])
+        if FAST_RESPONSES and isinstance(data, list) and (not data or isinstance(data[0], dict)):
+            return render_dicts(data)
+        return render_json(jsonable_encoder(parse_obj_as(response_model, data)))
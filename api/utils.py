@@ -1,29 +1,86 @@
+import os
 import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from starlette.requests import HTTPConnection
+
+# Distinct User-Agent strings remembered by the classifier
+UA_CACHE_SIZE = int(os.environ.get("UA_CACHE_SIZE", "1024"))
+
+# Common browser identifiers, in one alternation: Mozilla, Chrome, Safari,
+# Firefox, Edge, Opera, and Internet Explorer or IE11
+BROWSER_PATTERN = re.compile(r"Mozilla|Chrome|Safari|Firefox|Edge|Opera|MSIE|Trident")
+
+# Crawlers, link previewers and monitors, most of which also claim Mozilla
+BOT_PATTERN = re.compile(r"bot\b|crawl|spider|slurp|facebookexternalhit|preview|monitor|headless", re.IGNORECASE)
+
+# Browser families, checked in order since most UAs name several engines.
+# Append (family, pattern) pairs to recognise more.
+BROWSER_FAMILIES = [
+    ("edge", re.compile(r"Edg(?:e|A|iOS)?/")),
+    ("opera", re.compile(r"OPR/|Opera")),
+    ("samsung", re.compile(r"SamsungBrowser/")),
+    ("firefox", re.compile(r"Firefox/|FxiOS/")),
+    ("chrome", re.compile(r"Chrome/|CriOS/|Chromium/")),
+    ("safari", re.compile(r"Safari/")),
+    ("ie", re.compile(r"MSIE|Trident/")),
+]
+
+
+class ClientInfo(NamedTuple):
+    is_browser: bool
+    is_bot: bool
+    family: Optional[str]
 
 
 def is_browser(user_agent: str) -> bool:
     """
     Determine if the request is likely coming from a browser based on User-Agent.
-    
+
     Args:
         user_agent: The User-Agent header string
-        
+
     Returns:
         bool: True if the request appears to be from a browser, False otherwise
     """
+    return classify_user_agent(user_agent).is_browser
+
+
+@lru_cache(maxsize=UA_CACHE_SIZE)
+def classify_user_agent(user_agent: str) -> ClientInfo:
+    """
+    Classify a User-Agent string.
+
+    Results are memoized, since a handful of distinct UAs make up almost all
+    traffic.
+
+    Args:
+        user_agent: The User-Agent header string
+
+    Returns:
+        ClientInfo: Whether it looks like a browser, whether it is a bot and
+        the browser family, if recognised
+    """
     if not user_agent:
-        return False
-        
-    # Common browser identifiers
-    browser_patterns = [
-        r'Mozilla',
-        r'Chrome',
-        r'Safari',
-        r'Firefox',
-        r'Edge',
-        r'Opera',
-        r'MSIE|Trident',  # Internet Explorer or IE11
-    ]
-    
-    # Check if any browser pattern matches
-    return any(re.search(pattern, user_agent) for pattern in browser_patterns)
+        return ClientInfo(False, False, None)
+    family = next((name for name, pattern in BROWSER_FAMILIES if pattern.search(user_agent)), None)
+    return ClientInfo(
+        is_browser=BROWSER_PATTERN.search(user_agent) is not None,
+        is_bot=BOT_PATTERN.search(user_agent) is not None,
+        family=family,
+    )
+
+
+def client_info(connection: HTTPConnection) -> ClientInfo:
+    """
+    Classification of the connection's User-Agent, computed once per request.
+
+    ClientDetectionMiddleware fills request.state.client up front; this falls
+    back to classifying the header when the middleware did not run.
+    """
+    info = getattr(connection.state, "client", None)
+    if info is None:
+        info = classify_user_agent(connection.headers.get("User-Agent", ""))
+        connection.state.client = info
+    return info
@@ -1,32 +1,37 @@
+import logging
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
+from dependencies import get_db
+from loaders import warframe_options
 from models import Warframe
 from schemas import WarframeResponse
-from utils import is_browser
+from utils import client_info
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 @router.get("/", response_model=List[WarframeResponse])
-def read_warframes(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    # Get User-Agent
-    user_agent = request.headers.get("User-Agent", "")
-    
+async def read_warframes(request: Request, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+    # Classified once per request by ClientDetectionMiddleware
+    browser = client_info(request).is_browser
+
     # Check if it's a browser
-    if is_browser(user_agent):
+    if browser:
         # Maybe apply different pagination for browsers
         if limit > 20:
             limit = 20  # Restrict page size for browsers to avoid large pages
     else:
         # API clients might have different rate limits or capabilities
         pass
-    
-    # Log the client type (in a real app, use proper logging)
-    print(f"Request from {'browser' if is_browser(user_agent) else 'API client'}: {user_agent}")
-    
+
+    logger.debug("Request from %s: %s", "browser" if browser else "API client", request.headers.get("User-Agent", ""))
+
     # Continue with the regular logic
-    warframes = db.query(Warframe).offset(skip).limit(limit).all()
+    query = select(Warframe).options(*warframe_options()).order_by(Warframe.id).offset(skip).limit(limit)
+    warframes = (await db.scalars(query)).unique().all()
     return warframes
@@ -0,0 +1,161 @@
+import math
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from cache import Materialized, cache_body, cache_response, cached_response
+from dependencies import get_db
+from metrics import timed_serialization
+from models import Weapon
+from schemas import WeaponRank, WeaponStats
+from serializers import render_dicts
+
+# Computed weapon stats. Rankings run over NumPy arrays of the whole
+# weapons table, rebuilt when a write route invalidates the table in the
+# catalog cache or after WEAPON_STATS_TTL seconds, which also picks up rows
+# loaded outside the API. NumPy is imported on the first ranking, so cold
+# starts that never rank do not pay for it.
+WEAPON_STATS_TTL = float(os.environ.get("WEAPON_STATS_TTL", "300"))
+
+STAT_COLUMNS = ("damage", "critical_chance", "critical_multiplier", "status_chance")
+
+
+def avg_crit_multiplier(stats):
+    # Crit chances above 100% guarantee a crit and roll for the next tier,
+    # each tier adding one more (multiplier - 1), so the mean stays linear
+    return 1 + stats["critical_chance"] * (stats["critical_multiplier"] - 1)
+
+
+# Per-shot metrics, written as plain arithmetic on the stat columns so the
+# same formula runs on one weapon's floats and on the table's arrays
+METRICS = {
+    "damage": lambda stats: stats["damage"],
+    "critical_chance": lambda stats: stats["critical_chance"],
+    "status_chance": lambda stats: stats["status_chance"],
+    "crit_damage": lambda stats: stats["damage"] * stats["critical_multiplier"],
+    "avg_crit_multiplier": avg_crit_multiplier,
+    "avg_damage": lambda stats: stats["damage"] * avg_crit_multiplier(stats),
+}
+
+router = APIRouter(tags=["Weapons"])
+
+
+def compute_stats(weapon) -> dict:
+    """Every metric of one weapon; None where a stat it needs is missing"""
+    stats = {}
+    for column in STAT_COLUMNS:
+        value = getattr(weapon, column)
+        stats[column] = math.nan if value is None else float(value)
+    values = {name: metric(stats) for name, metric in METRICS.items()}
+    return {name: value if math.isfinite(value) else None for name, value in values.items()}
+
+
+class WeaponTable:
+    """The weapons table as NumPy columns, with every metric precomputed"""
+
+    def __init__(self, rows):
+        import numpy as np
+
+        self.np = np
+        rows = list(rows)
+        self.ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.names = [row[1] for row in rows]
+        # Types are stored as small integer codes, so a type filter is one
+        # vectorized comparison
+        self.type_names = []
+        codes = {}
+        for row in rows:
+            if row[2] not in codes:
+                codes[row[2]] = len(self.type_names)
+                self.type_names.append(row[2])
+        self.type_codes = np.array([codes[row[2]] for row in rows], dtype=np.int32)
+        self.codes = codes
+        # NULL stats become NaN, which drops out of every ranking using them
+        columns = {
+            column: np.array([row[3 + index] for row in rows], dtype=np.float64)
+            for index, column in enumerate(STAT_COLUMNS)
+        }
+        with np.errstate(invalid="ignore", over="ignore"):
+            self.metrics = {name: np.asarray(metric(columns), dtype=np.float64) for name, metric in METRICS.items()}
+
+    def top(self, metric: str, limit: int, weapon_type: Optional[str] = None, ascending: bool = False):
+        """
+        Positions of the best weapons by a metric, ties broken by id.
+
+        Only the rows that can make the cut are sorted: np.partition finds
+        the limit-th value in linear time first.
+        """
+        np = self.np
+        values = self.metrics[metric]
+        candidates = np.isfinite(values)
+        if weapon_type is not None:
+            code = self.codes.get(weapon_type)
+            if code is None:
+                return np.array([], dtype=np.int64)
+            candidates &= self.type_codes == code
+        positions = np.flatnonzero(candidates)
+        keys = values[positions] if ascending else -values[positions]
+        if limit < len(positions):
+            cut = np.partition(keys, limit - 1)[limit - 1]
+            kept = keys <= cut
+            positions, keys = positions[kept], keys[kept]
+        return positions[np.lexsort((self.ids[positions], keys))[:limit]]
+
+    def rank(self, metric: str, limit: int, weapon_type: Optional[str] = None, ascending: bool = False):
+        positions = self.top(metric, limit, weapon_type, ascending)
+        ids = self.ids[positions].tolist()
+        values = self.metrics[metric][positions].tolist()
+        codes = self.type_codes[positions].tolist()
+        return [
+            {"id": row_id, "name": self.names[position], "type": self.type_names[code], "value": value}
+            for row_id, position, code, value in zip(ids, positions.tolist(), codes, values)
+        ]
+
+
+async def load_weapon_table(db) -> WeaponTable:
+    columns = [Weapon.id, Weapon.name, Weapon.type, *(getattr(Weapon, name) for name in STAT_COLUMNS)]
+    rows = (await db.execute(select(*columns))).all()
+    return await run_in_threadpool(WeaponTable, rows)
+
+
+# The NumPy view of the weapons table, rebuilt when stale
+weapon_table = Materialized(("weapons",), WEAPON_STATS_TTL, load_weapon_table)
+
+
+@router.get("/weapons/ranking", response_model=List[WeaponRank])
+async def rank_weapons(
+    request: Request,
+    metric: str = Query("avg_damage", description="Metric to rank by: " + ", ".join(METRICS)),
+    weapon_type: Optional[str] = Query(None, description="Filter by weapon type (Primary, Secondary, Melee)"),
+    limit: int = Query(20, ge=1, le=1000),
+    ascending: bool = Query(False, description="Rank the lowest values first"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Weapons with the highest (or lowest) value of a computed per-shot metric"""
+    if metric not in METRICS:
+        raise HTTPException(status_code=400, detail=f"Unknown metric, use: {', '.join(METRICS)}")
+    cached = await cached_response(request, ("weapons",))
+    if cached is not None:
+        return cached
+    table = await weapon_table.get(db)
+    results = table.rank(metric, limit, weapon_type, ascending)
+    with timed_serialization():
+        body = render_dicts(results)
+    return await cache_body(request, body)
+
+
+@router.get("/weapons/{weapon_id}/stats", response_model=WeaponStats)
+async def read_weapon_stats(request: Request, weapon_id: int, db: AsyncSession = Depends(get_db)):
+    """Computed per-shot metrics of one weapon"""
+    cached = await cached_response(request, ("weapons",))
+    if cached is not None:
+        return cached
+    db_weapon = await db.get(Weapon, weapon_id)
+    if db_weapon is None:
+        raise HTTPException(status_code=404, detail="Weapon not found")
+    stats = {"id": db_weapon.id, "name": db_weapon.name, "type": db_weapon.type, **compute_stats(db_weapon)}
+    return await cache_response(request, WeaponStats, stats)
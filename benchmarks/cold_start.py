@@ -0,0 +1,217 @@
+"""
+Measure the cold start of the Mangum handler and report where import time goes.
+
+Each run starts a fresh interpreter that imports api/index.py and answers
+two API Gateway events through index.handler, timing interpreter start-up,
+the import, the first (cold) invocation and the second (warm) one. A
+separate pass runs `python -X importtime -c "import index"` and ranks the
+modules by their own and cumulative import time. Results are saved as JSON;
+--budget-ms fails the run when the median import plus first invocation
+exceeds the budget, and --compare prints the change against earlier results.
+
+    python benchmarks/cold_start.py --runs 10 --budget-ms 1500
+    python benchmarks/cold_start.py --database-url postgresql://... --path /warframes/
+
+Bytecode is compiled once before measuring, as a deployment that ships
+__pycache__ would have it. Pass --no-bytecode to include compilation.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+
+# Runs inside the fresh interpreter; prints its timings as JSON
+DRIVER = """
+import json, sys, time
+started = time.perf_counter()
+import index
+imported = time.perf_counter()
+
+def event(path):
+    return {
+        "version": "2.0", "routeKey": "$default", "rawPath": path, "rawQueryString": "",
+        "headers": {"host": "cold-start", "user-agent": "cold-start-benchmark"},
+        "requestContext": {
+            "http": {"method": "GET", "path": path, "protocol": "HTTP/1.1",
+                     "sourceIp": "127.0.0.1", "userAgent": "cold-start-benchmark"},
+            "stage": "$default", "domainName": "cold-start", "requestId": "1",
+            "accountId": "1", "apiId": "1", "time": "", "timeEpoch": 0,
+        },
+        "isBase64Encoded": False,
+    }
+
+class Context:
+    pass
+
+first = index.handler(event(sys.argv[1]), Context())
+invoked = time.perf_counter()
+second = index.handler(event(sys.argv[1]), Context())
+reinvoked = time.perf_counter()
+
+import asyncio, database
+engine = database.created_engines().get("async")
+if engine is not None:
+    # Pooled aiosqlite connections would keep the process alive
+    asyncio.get_event_loop().run_until_complete(engine.dispose())
+print(json.dumps({
+    "status": [first["statusCode"], second["statusCode"]],
+    "import_ms": (imported - started) * 1000,
+    "first_invocation_ms": (invoked - imported) * 1000,
+    "second_invocation_ms": (reinvoked - invoked) * 1000,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="database the handler talks to (default: a seeded SQLite file)")
+    parser.add_argument("--path", default="/weapons/", help="path requested by the cold and warm invocations")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes to time")
+    parser.add_argument("--top", type=int, default=25, help="modules listed in the import-time report")
+    parser.add_argument("--no-bytecode", action="store_true", help="measure with bytecode compilation included")
+    parser.add_argument("--budget-ms", type=float, help="fail when import + first invocation exceeds this")
+    parser.add_argument("--output", default="cold-start-results.json", help="where to write the results")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    return parser.parse_args()
+
+
+def environment(args, pycache: str) -> dict:
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPYCACHEPREFIX"] = pycache
+    if args.no_bytecode:
+        env["PYTHONDONTWRITEBYTECODE"] = "1"
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+    return env
+
+
+def run(env: dict, *argv: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, *argv], cwd=API_DIR, env=env, capture_output=True, text=True)
+
+
+def cold_start(env: dict, path: str) -> dict:
+    started = time.perf_counter()
+    result = run(env, "-c", DRIVER, path)
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        sys.exit(f"driver failed:\n{result.stderr}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    if any(status >= 500 for status in timings["status"]):
+        sys.exit(f"handler answered {timings['status']} for {path}:\n{result.stderr}")
+    # Process wall time minus what the driver measured: interpreter start-up
+    # and site imports before the first line, plus exit
+    timings["interpreter_ms"] = elapsed - timings["import_ms"] - timings["first_invocation_ms"] \
+        - timings["second_invocation_ms"]
+    timings["total_ms"] = elapsed
+    return timings
+
+
+def import_times(env: dict) -> dict:
+    """Self and cumulative import time per module, in ms, from -X importtime"""
+    result = run(env, "-X", "importtime", "-c", "import index")
+    if result.returncode != 0:
+        sys.exit(f"import failed:\n{result.stderr}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = {
+            "self_ms": int(own) / 1000,
+            "cumulative_ms": int(cumulative) / 1000,
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+        }
+    return modules
+
+
+def median_of(runs: list, key: str) -> float:
+    return round(statistics.median(run[key] for run in runs), 2)
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="warframe-cold-") as directory:
+        env = environment(args, os.path.join(directory, "pycache"))
+        if not args.database_url:
+            env["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'catalog.db')}"
+            seeded = run(env, "seeding.py")
+            if seeded.returncode != 0:
+                sys.exit(f"seeding failed:\n{seeded.stderr}")
+        # Prime the bytecode cache
+        run(env, "-c", "import index")
+
+        runs = [cold_start(env, args.path) for _ in range(args.runs)]
+        import_passes = [import_times(env) for _ in range(max(3, args.runs // 2))]
+
+    phases = ("interpreter_ms", "import_ms", "first_invocation_ms", "second_invocation_ms", "total_ms")
+    summary = {phase: median_of(runs, phase) for phase in phases}
+    summary["cold_start_ms"] = round(summary["import_ms"] + summary["first_invocation_ms"], 2)
+    summary["modules_loaded"] = runs[0]["modules"]
+
+    names = set().union(*import_passes)
+    modules = {
+        name: {
+            key: round(statistics.median(p[name][key] for p in import_passes if name in p), 3)
+            for key in ("self_ms", "cumulative_ms")
+        }
+        for name in names
+    }
+    by_self = sorted(modules.items(), key=lambda item: item[1]["self_ms"], reverse=True)[:args.top]
+    app_modules = {
+        name: stats for name, stats in modules.items()
+        if os.path.exists(os.path.join(API_DIR, name.split(".")[0] + ".py"))
+    }
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "path": args.path,
+            "runs": args.runs,
+            "bytecode": not args.no_bytecode,
+            "env": {name: os.environ[name] for name in ("DATABASE_ASYNC", "DB_WARM_UP", "DB_POOL_MODE")
+                    if name in os.environ},
+        },
+        "summary": summary,
+        "runs": runs,
+        "imports": {"top_self": dict(by_self), "app": app_modules, "index_cumulative_ms": modules["index"]["cumulative_ms"]},
+    }
+
+    print(f"{'phase':<24}{'median ms':>12}")
+    for phase in phases + ("cold_start_ms",):
+        print(f"{phase:<24}{summary[phase]:>12}")
+    print(f"\n{'module (by own import time)':<52}{'self ms':>10}{'cumul ms':>10}")
+    for name, stats in by_self:
+        print(f"{name:<52}{stats['self_ms']:>10}{stats['cumulative_ms']:>10}")
+    print(f"\n{'app module':<52}{'self ms':>10}{'cumul ms':>10}")
+    for name, stats in sorted(app_modules.items(), key=lambda item: item[1]["cumulative_ms"], reverse=True):
+        print(f"{name:<52}{stats['self_ms']:>10}{stats['cumulative_ms']:>10}")
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)["summary"]
+        print(f"\n{'phase':<24}{'before':>10}{'after':>10}{'change':>10}")
+        for phase in phases + ("cold_start_ms",):
+            before, after = previous.get(phase), summary[phase]
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "-"
+            print(f"{phase:<24}{before!s:>10}{after:>10}{change:>10}")
+
+    if args.budget_ms is not None and summary["cold_start_ms"] > args.budget_ms:
+        sys.exit(f"cold start {summary['cold_start_ms']} ms is over the {args.budget_ms} ms budget")
+
+
+if __name__ == "__main__":
+    main()
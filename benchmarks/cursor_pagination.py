@@ -0,0 +1,109 @@
+"""
+Check that cursor pagination returns every row, whatever the sort order.
+
+Fills a small weapons table whose stat columns hold NULLs and repeated
+values, then walks /weapons/ page by page through X-Next-Cursor for each
+sortable column, in both directions and a few page sizes. A walk fails when
+a row is missing or returned twice. Exits with status 1 on any failure, so
+it can run in CI.
+
+    python benchmarks/cursor_pagination.py
+    DATABASE_ASYNC=0 python benchmarks/cursor_pagination.py
+
+The rows are inserted directly: the seeder requires every stat, rows loaded
+by other means need not have them.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from load import API_UA  # noqa: E402
+
+PAGE_SIZES = (1, 2, 5, 100)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--weapons", type=int, default=12, help="weapons to insert")
+    return parser.parse_args()
+
+
+def weapon_rows(count: int) -> list:
+    """Every third weapon has no damage, every fourth no critical chance"""
+    return [
+        {
+            "name": f"Weapon {i}",
+            "type": ("Primary", "Secondary", "Melee")[i % 3],
+            "damage": None if i % 3 == 0 else float(10 * (i % 5)),
+            "critical_chance": None if i % 4 == 0 else 0.1 * (i % 2),
+            "critical_multiplier": 2.0,
+            "status_chance": None,
+            "description": "Synthetic",
+        }
+        for i in range(count)
+    ]
+
+
+async def walk(client, sort: str, page_size: int) -> list:
+    """Ids of every row listed by following cursors from the first page"""
+    ids, params = [], {"sort": sort, "limit": page_size, "fields": "id"}
+    while True:
+        response = await client.get("/weapons/", params=params)
+        response.raise_for_status()
+        ids.extend(row["id"] for row in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+        params["cursor"] = cursor
+
+
+async def main():
+    args = parse_args()
+    directory = tempfile.mkdtemp(prefix="warframe-cursors-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'catalog.db')}"
+    os.environ["CACHE_TTL"] = "0"
+
+    import httpx
+    from sqlalchemy import insert
+
+    from database import created_engines, get_engine
+    from index import app
+    from migrations import migrate
+    from models import Weapon
+    from pagination import SORTABLE_COLUMNS
+
+    engine = get_engine()
+    migrate(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Weapon), weapon_rows(args.weapons))
+
+    failures = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://cursors",
+                                 headers={"User-Agent": API_UA}) as client:
+        for column in SORTABLE_COLUMNS["weapons"]:
+            for sort in (column, "-" + column):
+                for page_size in PAGE_SIZES:
+                    ids = await walk(client, sort, page_size)
+                    missing = args.weapons - len(set(ids))
+                    repeated = len(ids) - len(set(ids))
+                    failed = bool(missing or repeated)
+                    failures += failed
+                    print(f"{'FAIL' if failed else 'ok':<5}sort={sort:<22} limit={page_size:<4}"
+                          f"{len(set(ids))}/{args.weapons} rows"
+                          + (f", {missing} missing, {repeated} repeated" if failed else ""))
+
+    if "async" in created_engines():
+        # Pooled aiosqlite connections keep their worker threads alive
+        await created_engines()["async"].dispose()
+
+    print(f"\n{failures} walk(s) lost or repeated rows" if failures else "\nevery walk returned every row once")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,489 @@
+"""
+Load-test every endpoint of the API in-process and save the results as JSON.
+
+Seeds a synthetic catalog through the bulk loader, then drives the FastAPI
+app over httpx's ASGI transport, endpoint by endpoint, and reports
+throughput, p50/p95/p99 latency, SQL statements and DB time per request (from
+the Server-Timing header) and the peak memory allocated per request. Runs use
+a fixed random seed, so two runs against the same code and database produce
+comparable numbers; pass a previous results file to --compare to see what
+moved.
+
+    python benchmarks/load.py --weapons 100000 --mods 100000 --warframes 500
+    python benchmarks/load.py --output after.json --compare before.json
+
+By default the catalog goes into a throwaway SQLite file. Point
+--database-url at a local Postgres to benchmark against it instead; add
+--reset to drop and recreate its tables first. The response cache is off
+unless CACHE_TTL is set in the environment.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import secrets
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+BROWSER_UA = "Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0"
+API_UA = "warframe-api-benchmark/1.0"
+SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+WEAPON_TYPES = ("Primary", "Secondary", "Melee")
+MOD_TYPES = ("Warframe", "Primary", "Secondary", "Melee", "Companion")
+RARITIES = ("Common", "Uncommon", "Rare", "Legendary")
+# Environment flags recorded with the results, since they change the numbers
+RECORDED_ENV = (
+    "DATABASE_ASYNC", "FAST_RESPONSES", "RELATIONSHIP_LOADING", "CACHE_TTL", "CACHE_BACKEND",
+    "DB_POOL_MODE", "DB_POOL_SIZE", "METRICS_ENABLED",
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="database to seed and query (default: a temporary SQLite file)")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate the tables before seeding")
+    parser.add_argument("--no-seed", action="store_true", help="benchmark the data already in the database")
+    parser.add_argument("--weapons", type=int, default=10000, help="synthetic weapons to seed")
+    parser.add_argument("--mods", type=int, default=10000, help="synthetic mods to seed")
+    parser.add_argument("--warframes", type=int, default=500, help="synthetic warframes to seed")
+    parser.add_argument("--abilities-per-warframe", type=int, default=4, help="abilities linked to each warframe")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=1, help="requests in flight for read endpoints")
+    parser.add_argument("--allocation-samples", type=int, default=5, help="requests traced with tracemalloc")
+    parser.add_argument("--only", help="regular expression selecting scenarios by name")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the synthetic catalog")
+    parser.add_argument("--output", default="benchmark-results.json", help="where to write the results")
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit 1 when --compare finds a regression")
+    return parser.parse_args()
+
+
+def configure_environment(args):
+    """Set the environment the api modules read at import time"""
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        path = os.path.join(tempfile.mkdtemp(prefix="warframe-bench-"), "catalog.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    os.environ.setdefault("CACHE_TTL", "0")
+    os.environ.setdefault("ADMIN_TOKEN", secrets.token_hex(16))
+    # Query counts and DB time are read from the Server-Timing header
+    os.environ["METRICS_ENABLED"] = "1"
+    os.environ["SERVER_TIMING"] = "1"
+
+
+def write_catalog(directory: str, args):
+    """Write the synthetic catalog as NDJSON files for seeding.seed()"""
+    rng = random.Random(args.seed)
+    ability_count = args.warframes * args.abilities_per_warframe
+
+    def dump(table, records):
+        with open(os.path.join(directory, f"{table}.ndjson"), "w") as file:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
+
+    dump("abilities", (
+        {"name": f"Ability {i}", "description": f"Synthetic ability {i}", "energy_cost": rng.choice((25, 50, 75, 100))}
+        for i in range(ability_count)
+    ))
+    dump("warframes", (
+        {
+            "name": f"Warframe {i}",
+            "health": rng.randrange(75, 400, 25),
+            "shield": rng.randrange(0, 600, 25),
+            "armor": rng.randrange(0, 900, 15),
+            "energy": rng.randrange(100, 250, 25),
+            "description": f"Synthetic warframe {i}",
+            "abilities": [f"Ability {i * args.abilities_per_warframe + n}" for n in range(args.abilities_per_warframe)],
+        }
+        for i in range(args.warframes)
+    ))
+    dump("weapons", (
+        {
+            "name": f"Weapon {i}",
+            "type": rng.choice(WEAPON_TYPES),
+            "damage": round(rng.uniform(5, 500), 1),
+            "critical_chance": round(rng.uniform(0.01, 0.5), 2),
+            "critical_multiplier": round(rng.uniform(1.5, 3.5), 1),
+            "status_chance": round(rng.uniform(0.01, 0.5), 2),
+            "description": f"Synthetic weapon {i}",
+        }
+        for i in range(args.weapons)
+    ))
+    dump("mods", (
+        {
+            "name": f"Mod {i}",
+            "type": rng.choice(MOD_TYPES),
+            "rarity": rng.choice(RARITIES),
+            "drain": rng.randrange(2, 16),
+            "description": f"Synthetic mod {i}",
+            "effect": f"+{rng.randrange(10, 200)}% Damage",
+        }
+        for i in range(args.mods)
+    ))
+
+
+class Scenario:
+    """
+    One endpoint under test.
+
+    build(i, ctx) returns the keyword arguments of the i-th request; after,
+    if given, sees each response so writes can hand ids to later scenarios.
+    Writes run one request at a time.
+    """
+
+    def __init__(self, name, build, after=None, write=False, requests=None):
+        self.name = name
+        self.build = build
+        self.after = after
+        self.write = write
+        self.requests = requests
+
+
+def scenarios(ctx, args):
+    admin = {"X-Admin-Token": os.environ["ADMIN_TOKEN"]}
+    export_requests = max(1, args.requests // 50)
+    # Unique per run, so created rows never collide with earlier runs
+    run = ctx["run"]
+
+    def pick(table, i):
+        ids = ctx[table]
+        return ids[i % len(ids)]
+
+    def batch_ids(table, i):
+        return [pick(table, i * 50 + n) for n in range(50)]
+
+    def evaluate_body(i, ctx):
+        # Eight mods per build, drawn from the same seeded pool every run
+        rng = random.Random(i)
+        mods = ctx["primary_mods"]
+        builds = [rng.sample(mods, min(8, len(mods))) for _ in range(1000)]
+        body = {"weapon_id": pick("primary_weapons", i), "builds": builds, "rank_by": "avg_damage", "limit": 20}
+        return {"method": "POST", "url": "/builds/evaluate", "json": body}
+
+    def get(path, **kwargs):
+        return lambda i, ctx: {"method": "GET", "url": path(i) if callable(path) else path, **kwargs}
+
+    def created(table):
+        def after(response, ctx):
+            body = response.json()
+            ctx.setdefault(f"created_{table}", []).append((body["id"], body["name"]))
+        return after
+
+    def bulk_body(prefix, make):
+        return lambda i, ctx: {
+            "method": "POST",
+            "url": f"/{prefix}/bulk",
+            "json": [make(f"{run}-{i}-{n}") for n in range(100)],
+        }
+
+    weapon = lambda name: {"name": f"Bench weapon {name}", "type": "Primary", "damage": 10.0,  # noqa: E731
+                           "critical_chance": 0.1, "critical_multiplier": 2.0, "status_chance": 0.1,
+                           "description": "Benchmark"}
+    mod = lambda name: {"name": f"Bench mod {name}", "type": "Warframe", "rarity": "Common",  # noqa: E731
+                        "drain": 4, "description": "Benchmark", "effect": "+10% Health"}
+    warframe = lambda name: {"name": f"Bench warframe {name}", "health": 100, "shield": 100,  # noqa: E731
+                             "armor": 100, "energy": 100, "description": "Benchmark"}
+    ability = lambda name: {"name": f"Bench ability {name}", "description": "Benchmark",  # noqa: E731
+                            "energy_cost": 25}
+
+    return [
+        Scenario("GET / (browser)", get("/", headers={"User-Agent": BROWSER_UA})),
+        Scenario("GET /", get("/")),
+        Scenario("GET /browser-dashboard", get("/browser-dashboard", headers={"User-Agent": BROWSER_UA})),
+        Scenario("GET /api-stats", get("/api-stats")),
+        Scenario("GET /adaptive-endpoint", get("/adaptive-endpoint")),
+        Scenario("GET /internal/pool", get("/internal/pool", headers=admin)),
+        Scenario("GET /internal/cache", get("/internal/cache", headers=admin)),
+        Scenario("GET /metrics", get("/metrics", headers=admin)),
+        Scenario("GET /warframes/", get("/warframes/")),
+        Scenario("GET /warframes/?sort=-health", get("/warframes/?sort=-health")),
+        Scenario("GET /warframes/?include_abilities=false", get("/warframes/?include_abilities=false")),
+        Scenario("GET /warframes/{id}", get(lambda i: f"/warframes/{pick('warframes', i)}")),
+        Scenario("GET /abilities/", get("/abilities/")),
+        Scenario("GET /weapons/", get("/weapons/")),
+        Scenario("GET /weapons/?skip=deep", get(lambda i: f"/weapons/?skip={max(0, len(ctx['weapons']) - 200)}")),
+        Scenario("GET /weapons/?sort=-damage", get("/weapons/?sort=-damage")),
+        Scenario("GET /weapons/{id}", get(lambda i: f"/weapons/{pick('weapons', i)}")),
+        Scenario("GET /weapons/{id}/stats", get(lambda i: f"/weapons/{pick('weapons', i)}/stats")),
+        Scenario("GET /weapons/ranking", get("/weapons/ranking")),
+        Scenario("GET /weapons/ranking?weapon_type=Melee",
+                 get("/weapons/ranking?metric=crit_damage&weapon_type=Melee&limit=100")),
+        Scenario("GET /mods/", get("/mods/")),
+        Scenario("GET /mods/{id}", get(lambda i: f"/mods/{pick('mods', i)}")),
+        # Words of the synthetic names, and a typo the fuzzy match has to absorb
+        Scenario("GET /search?q=name", get(lambda i: f"/search?q=Weapon%20{i % 1000}")),
+        Scenario("GET /search?q=typo", get("/search?q=warfrme")),
+        *(
+            scenario
+            for table in ("warframes", "abilities", "weapons", "mods")
+            for scenario in (
+                Scenario(f"GET /{table}/batch (50 ids)",
+                         get(lambda i, table=table: f"/{table}/batch?ids={','.join(map(str, batch_ids(table, i)))}")),
+                Scenario(f"POST /{table}/batch (50 ids)",
+                         lambda i, ctx, table=table: {"method": "POST", "url": f"/{table}/batch",
+                                                      "json": {"ids": batch_ids(table, i)}}),
+            )
+        ),
+        Scenario("POST /builds/evaluate (1000 builds)", evaluate_body),
+        Scenario("GET /export/weapons.ndjson", get("/export/weapons.ndjson"), requests=export_requests),
+        Scenario("GET /export/all.ndjson", get("/export/all.ndjson"), requests=export_requests),
+        Scenario("POST /weapons/", lambda i, ctx: {"method": "POST", "url": "/weapons/", "json": weapon(f"{run}-{i}")},
+                 write=True),
+        Scenario("POST /mods/", lambda i, ctx: {"method": "POST", "url": "/mods/", "json": mod(f"{run}-{i}")},
+                 write=True),
+        Scenario("POST /abilities/", lambda i, ctx: {"method": "POST", "url": "/abilities/", "json": ability(f"{run}-{i}")},
+                 write=True),
+        Scenario("POST /warframes/",
+                 lambda i, ctx: {"method": "POST", "url": "/warframes/", "json": warframe(f"{run}-{i}")},
+                 after=created("warframes"), write=True),
+        Scenario("POST /warframes/{id}/abilities/{id}",
+                 lambda i, ctx: {"method": "POST",
+                                 "url": f"/warframes/{pick('created_warframes', i)[0]}/abilities/{pick('abilities', i)}"},
+                 write=True),
+        Scenario("PUT /warframes/{id}",
+                 lambda i, ctx: {"method": "PUT", "url": f"/warframes/{pick('created_warframes', i)[0]}",
+                                 "json": {**warframe(""), "name": pick('created_warframes', i)[1], "armor": i}},
+                 write=True),
+        Scenario("DELETE /warframes/{id}",
+                 lambda i, ctx: {"method": "DELETE", "url": f"/warframes/{ctx['created_warframes'].pop()[0]}"},
+                 write=True),
+        Scenario("POST /weapons/bulk (100)", bulk_body("weapons", weapon), write=True),
+        Scenario("POST /mods/bulk (100)", bulk_body("mods", mod), write=True),
+        Scenario("POST /abilities/bulk (100)", bulk_body("abilities", ability), write=True),
+        Scenario("POST /warframes/bulk (100)", bulk_body("warframes", warframe), write=True),
+    ]
+
+
+def uncovered_routes(app, covered):
+    """API routes no scenario exercises, as "METHOD path" strings"""
+    from fastapi.routing import APIRoute
+
+    missing = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for method in route.methods:
+            key = f"{method} {route.path}"
+            if not any(name.startswith(f"{method} ") and route_matches(route, name) for name in covered):
+                missing.append(key)
+    return sorted(missing)
+
+
+def route_matches(route, scenario_name: str) -> bool:
+    path = scenario_name.split(" ", 2)[1].replace("{id}", "1").split("?")[0]
+    return route.path_regex.match(path) is not None
+
+
+async def run_scenario(client, scenario, ctx, count, concurrency):
+    latencies, queries, db_times, errors = [], [], [], 0
+    counter = iter(range(count))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            request = scenario.build(i, ctx)
+            start = time.perf_counter()
+            response = await client.request(**request)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            elif scenario.after is not None:
+                scenario.after(response, ctx)
+            timing = SERVER_TIMING.search(response.headers.get("server-timing", ""))
+            if timing:
+                db_times.append(float(timing.group(1)))
+                queries.append(int(timing.group(2)))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(1 if scenario.write else concurrency)))
+    elapsed = time.perf_counter() - started
+    return latencies, queries, db_times, errors, elapsed
+
+
+async def measure_allocations(client, scenario, ctx, samples, offset):
+    """Mean peak of memory allocated while serving one request, in KiB"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for i in range(offset, offset + samples):
+            request = scenario.build(i, ctx)
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            response = await client.request(**request)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            if response.status_code < 400 and scenario.after is not None:
+                scenario.after(response, ctx)
+    finally:
+        tracemalloc.stop()
+    return round(statistics.mean(peaks) / 1024, 1) if peaks else None
+
+
+def summarize(latencies, queries, db_times, errors, elapsed, allocations):
+    ms = sorted(value * 1000 for value in latencies)
+    cuts = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    return {
+        "requests": len(ms),
+        "errors": errors,
+        "throughput_rps": round(len(ms) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": round(statistics.mean(ms), 3),
+            "p50": round(cuts[49], 3),
+            "p95": round(cuts[94], 3),
+            "p99": round(cuts[98], 3),
+            "max": round(ms[-1], 3),
+        },
+        "db_queries_mean": round(statistics.mean(queries), 2) if queries else None,
+        "db_ms_mean": round(statistics.mean(db_times), 3) if db_times else None,
+        "alloc_peak_kib": allocations,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous, threshold):
+    """Print the change of each shared scenario and return the regressions"""
+    regressions = []
+    print(f"\nCompared with {previous['meta'].get('revision')} ({previous['meta'].get('timestamp')}):")
+    for key in ("database", "catalog", "requests", "concurrency", "env"):
+        if current["meta"].get(key) != previous["meta"].get(key):
+            print(f"warning: runs differ in {key}: {previous['meta'].get(key)} -> {current['meta'].get(key)}")
+    print(f"{'scenario':<44}{'p50':>18}{'p99':>18}{'rps':>18}")
+    for name, result in current["scenarios"].items():
+        before = previous["scenarios"].get(name)
+        if before is None:
+            continue
+        cells = []
+        for key, higher_is_worse in (("p50", True), ("p99", True), ("throughput_rps", False)):
+            new = result["latency_ms"][key] if key != "throughput_rps" else result[key]
+            old = before["latency_ms"][key] if key != "throughput_rps" else before[key]
+            change = (new - old) / old * 100 if old else 0.0
+            worse = change > threshold if higher_is_worse else change < -threshold
+            if worse:
+                regressions.append(f"{name} {key}")
+            cells.append(f"{old:>7} -> {new:<7}{'!' if worse else ' '}")
+        print(f"{name:<44}{''.join(f'{cell:>18}' for cell in cells)}")
+    return regressions
+
+
+async def main():
+    args = parse_args()
+    configure_environment(args)
+
+    import httpx
+    from sqlalchemy import select
+
+    from builds import WEAPON_MOD_TYPES
+    from database import created_engines, get_engine, get_sessionmaker
+    from index import app
+    from models import Ability, Base, Mod, Warframe, Weapon
+    from seeding import seed
+
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "database": get_engine().url.get_backend_name(),
+        "catalog": {
+            "weapons": args.weapons, "mods": args.mods, "warframes": args.warframes,
+            "abilities_per_warframe": args.abilities_per_warframe, "seed": args.seed,
+        },
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "env": {name: os.environ[name] for name in RECORDED_ENV if name in os.environ},
+    }
+
+    if args.reset:
+        Base.metadata.drop_all(get_engine())
+    if not args.no_seed:
+        with tempfile.TemporaryDirectory() as directory:
+            write_catalog(directory, args)
+            meta["seeding"] = seed(get_engine(), directory)
+        for table, stats in meta["seeding"].items():
+            print(f"seeded {table}: {stats['rows']} rows at {stats['rows_per_second']} rows/s")
+
+    with get_sessionmaker()() as session:
+        ctx = {
+            "run": secrets.token_hex(4),
+            "warframes": session.scalars(select(Warframe.id).order_by(Warframe.id)).all(),
+            "abilities": session.scalars(select(Ability.id).order_by(Ability.id)).all(),
+            "weapons": session.scalars(select(Weapon.id).order_by(Weapon.id)).all(),
+            "mods": session.scalars(select(Mod.id).order_by(Mod.id)).all(),
+            # Build evaluations need mods that fit the weapon
+            "primary_weapons": session.scalars(
+                select(Weapon.id).where(Weapon.type == "Primary").order_by(Weapon.id)
+            ).all(),
+            "primary_mods": session.scalars(
+                select(Mod.id).where(Mod.type.in_(WEAPON_MOD_TYPES["Primary"])).order_by(Mod.id).limit(200)
+            ).all(),
+        }
+    if not all(ctx[table] for table in ("warframes", "abilities", "weapons", "mods", "primary_weapons", "primary_mods")):
+        sys.exit("every table, and Primary weapons and mods, need at least one row; seed the database first")
+
+    selected = [s for s in scenarios(ctx, args) if not args.only or re.search(args.only, s.name)]
+    missing = uncovered_routes(app, [s.name for s in scenarios(ctx, args)])
+    if missing:
+        print(f"warning: no scenario for {', '.join(missing)}")
+
+    results = {"meta": meta, "scenarios": {}}
+    # Server errors are counted like any other failed request
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark",
+                                 headers={"User-Agent": API_UA}) as client:
+        print(f"{'scenario':<44}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}{'KiB':>9}")
+        for scenario in selected:
+            count = scenario.requests or args.requests
+            # Warm-up, untimed
+            for i in range(min(3, count)):
+                request = scenario.build(count + i, ctx)
+                response = await client.request(**request)
+                if response.status_code < 400 and scenario.after is not None:
+                    scenario.after(response, ctx)
+            measured = await run_scenario(client, scenario, ctx, count, args.concurrency)
+            allocations = await measure_allocations(
+                client, scenario, ctx, min(args.allocation_samples, count), 2 * count
+            )
+            result = summarize(*measured, allocations)
+            results["scenarios"][scenario.name] = result
+            latency = result["latency_ms"]
+            print(f"{scenario.name:<44}{result['throughput_rps']:>9}{latency['p50']:>9}{latency['p95']:>9}"
+                  f"{latency['p99']:>9}{str(result['db_queries_mean']):>9}{str(result['alloc_peak_kib']):>9}"
+                  f"{'  errors: ' + str(result['errors']) if result['errors'] else ''}")
+
+    if "async" in created_engines():
+        await created_engines()["async"].dispose()
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold}%: {', '.join(regressions)}")
+            if args.fail_on_regression:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+"""
+Compare request latency with the BaseHTTPMiddleware and ASGI client detection.
+
+Builds the app against a temporary SQLite database seeded with weapons, then
+drives it in-process through the ASGI interface, once with the original
+BaseHTTPMiddleware implementation swapped in and once as shipped, and prints
+p50/p99 latency per endpoint. Also checks that streamed exports still arrive
+in several chunks.
+
+    python benchmarks/middleware.py --requests 2000 --rows 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/benchmark.db")
+# Measure the middleware, not the response cache
+os.environ.setdefault("CACHE_TTL", "0")
+os.environ.setdefault("EXPORT_BATCH_SIZE", "10")
+
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from database import created_engines, get_engine  # noqa: E402
+from index import ClientDetectionMiddleware, app  # noqa: E402
+from models import Base, Weapon  # noqa: E402
+from utils import client_info  # noqa: E402
+
+ENDPOINTS = ["/", "/weapons/", "/warframes/"]
+USER_AGENT = b"Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0"
+
+
+class LegacyClientDetectionMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        user_agent = request.headers.get("User-Agent", "")
+        request.state.is_browser = client_info(request).is_browser
+        request.state.user_agent = user_agent
+        return await call_next(request)
+
+
+def use_middleware(cls):
+    """Rebuild the app's middleware stack with cls as the client detection"""
+    app.user_middleware = [
+        Middleware(cls) if middleware.cls in (ClientDetectionMiddleware, LegacyClientDetectionMiddleware)
+        else middleware
+        for middleware in app.user_middleware
+    ]
+    app.middleware_stack = app.build_middleware_stack()
+
+
+async def request(path: str, user_agent: bytes = USER_AGENT):
+    """Send one GET through the ASGI app and collect the response messages"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"benchmark"), (b"user-agent", user_agent)],
+        "client": ("127.0.0.1", 1234),
+        "server": ("benchmark", 80),
+    }
+    messages = []
+    disconnected = asyncio.Event()
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Streaming responses listen for a disconnect until they finish
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    disconnected.set()
+    return messages
+
+
+async def measure(path: str, count: int) -> list:
+    for _ in range(min(count, 50)):
+        await request(path)
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        messages = await request(path)
+        latencies.append(time.perf_counter() - start)
+    if messages[0]["status"] != 200:
+        sys.exit(f"{path} returned {messages[0]['status']}")
+    return latencies
+
+
+def percentile(values: list, fraction: float) -> float:
+    return statistics.quantiles(values, n=100, method="inclusive")[round(fraction * 100) - 1]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000, help="timed requests per endpoint")
+    parser.add_argument("--rows", type=int, default=100, help="weapons in the database")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(get_engine())
+    with Session(get_engine()) as session:
+        session.add_all(
+            Weapon(name=f"Weapon {i}", type="Primary", damage=10.0 + i, critical_chance=0.1,
+                   critical_multiplier=2.0, status_chance=0.1, description="Benchmark weapon")
+            for i in range(args.rows)
+        )
+        session.commit()
+
+    results = {}
+    for name, cls in (("base", LegacyClientDetectionMiddleware), ("asgi", ClientDetectionMiddleware)):
+        use_middleware(cls)
+        chunks = [m for m in await request("/export/weapons.ndjson") if m["type"] == "http.response.body"]
+        if len(chunks) < 2:
+            sys.exit(f"{name}: export arrived in {len(chunks)} chunk(s), expected a stream")
+        for path in ENDPOINTS:
+            results[name, path] = await measure(path, args.requests)
+    if "async" in created_engines():
+        # Pooled aiosqlite connections keep their worker threads alive
+        await created_engines()["async"].dispose()
+
+    print(f"{'endpoint':<12}{'base p50':>10}{'asgi p50':>10}{'base p99':>10}{'asgi p99':>10}   (ms)")
+    for path in ENDPOINTS:
+        base, asgi = results["base", path], results["asgi", path]
+        print(f"{path:<12}"
+              f"{percentile(base, 0.5) * 1000:10.3f}{percentile(asgi, 0.5) * 1000:10.3f}"
+              f"{percentile(base, 0.99) * 1000:10.3f}{percentile(asgi, 0.99) * 1000:10.3f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
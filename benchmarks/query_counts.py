@@ -0,0 +1,118 @@
+"""
+Check that listing warframes costs the same number of queries at any page size.
+
+Lists /warframes/ with page sizes 1, 10 and 100 (first page and the page its
+cursor points to) under each relationship loading strategy, and reads the
+statement count of every request from its Server-Timing header. A strategy
+fails the check when the count changes with the page size, which is what an
+N+1 regression looks like, or exceeds its budget. Exits with status 1 on
+any failure, so it can run in CI.
+
+    python benchmarks/query_counts.py
+    DATABASE_ASYNC=0 python benchmarks/query_counts.py
+
+RELATIONSHIP_LOADING is read when the app is imported, so each strategy is
+checked in its own process on the same generated SQLite catalog.
+"""
+import argparse
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from load import API_UA, write_catalog  # noqa: E402
+
+PAGE_SIZES = (1, 10, 100)
+# Most statements one page may take: the warframes, then for selectin one
+# IN query for the abilities of the whole page
+QUERY_BUDGET = {"selectin": 2, "joined": 1}
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--warframes", type=int, default=300, help="synthetic warframes to generate")
+    parser.add_argument("--abilities-per-warframe", type=int, default=4, help="abilities linked to each warframe")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the synthetic catalog")
+    parser.add_argument("--strategy", choices=sorted(QUERY_BUDGET), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+async def query_counts(client, page_size: int) -> list:
+    """Statements run by the first two pages of /warframes/"""
+    counts, params = [], {"limit": page_size}
+    for _ in range(2):
+        response = await client.get("/warframes/", params=params)
+        response.raise_for_status()
+        counts.append(int(SERVER_TIMING_QUERIES.search(response.headers["Server-Timing"]).group(1)))
+        params["cursor"] = response.headers["X-Next-Cursor"]
+    return counts
+
+
+async def check(strategy: str) -> int:
+    """Check one strategy against the catalog in DATABASE_URL; return the failures"""
+    import httpx
+
+    from database import created_engines
+    from index import app
+
+    failures = 0
+    seen = set()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://queries",
+                                 headers={"User-Agent": API_UA}) as client:
+        for page_size in PAGE_SIZES:
+            counts = await query_counts(client, page_size)
+            seen.update(counts)
+            over = max(counts) > QUERY_BUDGET[strategy]
+            failures += over
+            print(f"{'FAIL' if over else 'ok':<5}{strategy:<9} limit={page_size:<4}queries per page: "
+                  + ", ".join(map(str, counts)))
+    if len(seen) > 1:
+        failures += 1
+        print(f"FAIL {strategy:<9} query count depends on the page size")
+
+    if "async" in created_engines():
+        # Pooled aiosqlite connections keep their worker threads alive
+        await created_engines()["async"].dispose()
+    return failures
+
+
+def main():
+    args = parse_args()
+    os.environ["CACHE_TTL"] = "0"
+    os.environ["METRICS_ENABLED"] = os.environ["SERVER_TIMING"] = "1"
+    if args.strategy:
+        sys.exit(1 if asyncio.run(check(args.strategy)) else 0)
+
+    directory = tempfile.mkdtemp(prefix="warframe-queries-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'catalog.db')}"
+
+    from database import get_engine
+    from seeding import seed
+
+    # Only warframes and their abilities are listed
+    args.weapons = args.mods = 0
+    write_catalog(directory, args)
+    seed(get_engine(), directory)
+
+    failed = []
+    for strategy in QUERY_BUDGET:
+        result = subprocess.run(
+            [sys.executable, __file__, "--strategy", strategy],
+            env={**os.environ, "RELATIONSHIP_LOADING": strategy},
+        )
+        if result.returncode:
+            failed.append(strategy)
+
+    print(f"\nquery count varies or exceeds its budget with: {', '.join(failed)}" if failed
+          else "\nevery strategy lists a page in a constant number of queries")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
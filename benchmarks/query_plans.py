@@ -0,0 +1,163 @@
+"""
+Check that the filtered list endpoints are served by indexes.
+
+Requests each filtered list endpoint in-process (first page and the page its
+cursor points to), captures the SQL the app sends to the database and runs
+EXPLAIN on every statement with the same parameters. A statement fails the
+check when its plan reads a checked table sequentially and that table holds
+more than --min-rows rows. Exits with status 1 on any failure, so it can run
+in CI.
+
+    python benchmarks/query_plans.py
+    python benchmarks/query_plans.py --database-url postgresql://... --min-rows 5000
+
+By default a temporary SQLite database is filled with a synthetic catalog
+(the one benchmarks/load.py generates) and analyzed. An existing database is
+checked as is; run api/migrations.py on it first.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from load import API_UA, MOD_TYPES, RARITIES, WEAPON_TYPES, write_catalog  # noqa: E402
+
+# Endpoint and the tables a full scan is not acceptable on
+CASES = [
+    (f"/weapons/?weapon_type={WEAPON_TYPES[0]}", ("weapons",)),
+    (f"/weapons/?weapon_type={WEAPON_TYPES[0]}&sort=-id", ("weapons",)),
+    (f"/mods/?mod_type={MOD_TYPES[0]}", ("mods",)),
+    (f"/mods/?rarity={RARITIES[2]}", ("mods",)),
+    (f"/mods/?rarity={RARITIES[2]}&sort=-id", ("mods",)),
+    (f"/mods/?mod_type={MOD_TYPES[0]}&rarity={RARITIES[2]}", ("mods",)),
+    # The abilities of a page of warframes, loaded through the link table
+    ("/warframes/", ("warframe_ability", "abilities")),
+]
+# SQLite names tables by their alias in plans, e.g. warframe_ability_1
+SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+?)(?:_\d+)?(?: |$)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="database to check (default: a generated SQLite catalog)")
+    parser.add_argument("--min-rows", type=int, default=1000, help="sequential scans of smaller tables pass")
+    parser.add_argument("--page-size", type=int, default=50, help="limit used for every request")
+    parser.add_argument("--weapons", type=int, default=20000, help="synthetic weapons to generate")
+    parser.add_argument("--mods", type=int, default=20000, help="synthetic mods to generate")
+    parser.add_argument("--warframes", type=int, default=2000, help="synthetic warframes to generate")
+    parser.add_argument("--abilities-per-warframe", type=int, default=4, help="abilities linked to each warframe")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the synthetic catalog")
+    return parser.parse_args()
+
+
+def explain(connection, statement: str, parameters) -> tuple:
+    """Plan of a statement as printable lines and the tables it scans sequentially"""
+    if connection.dialect.name == "postgresql":
+        plan = connection.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        lines, scanned = [], set()
+
+        def walk(node, depth):
+            relation = node.get("Relation Name")
+            lines.append("  " * depth + node["Node Type"] + (f" on {relation}" if relation else "")
+                         + (f" using {node['Index Name']}" if "Index Name" in node else ""))
+            if node["Node Type"] == "Seq Scan":
+                scanned.add(relation)
+            for child in node.get("Plans", ()):
+                walk(child, depth + 1)
+
+        walk(plan[0]["Plan"], 0)
+        return lines, scanned
+
+    rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+    lines = [row[-1] for row in rows]
+    scanned = {match.group(1) for match in map(SQLITE_SCAN.match, lines) if match}
+    return lines, scanned
+
+
+async def capture(client, engine, path: str, page_size: int) -> list:
+    """(statement, parameters) of every SELECT run for the first two pages of path"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        url = f"{path}{'&' if '?' in path else '?'}limit={page_size}"
+        response = await client.get(url)
+        response.raise_for_status()
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor:
+            (await client.get(url, params={"cursor": cursor})).raise_for_status()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return statements
+
+
+async def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        directory = tempfile.mkdtemp(prefix="warframe-plans-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'catalog.db')}"
+    # Plans are checked on the sync engine the statements are captured from
+    os.environ["DATABASE_ASYNC"] = "0"
+    os.environ["CACHE_TTL"] = "0"
+
+    import httpx
+    from sqlalchemy import text
+
+    from database import get_engine
+    from index import app
+    from seeding import seed
+
+    engine = get_engine()
+    if not args.database_url:
+        write_catalog(directory, args)
+        seed(engine, directory)
+        with engine.begin() as connection:
+            connection.execute(text("ANALYZE"))
+
+    with engine.connect() as connection:
+        counts = {
+            table: connection.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+            for table in {table for _, tables in CASES for table in tables}
+        }
+    print("rows: " + ", ".join(f"{table}={count}" for table, count in sorted(counts.items())))
+
+    failures = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://plans",
+                                 headers={"User-Agent": API_UA}) as client:
+        for path, tables in CASES:
+            statements = await capture(client, engine, path, args.page_size)
+            with engine.connect() as connection:
+                for statement, parameters in statements:
+                    lines, scanned = explain(connection, statement, parameters)
+                    bad = sorted(table for table in scanned & set(tables) if counts[table] > args.min_rows)
+                    failures += bool(bad)
+                    print(f"\n{'FAIL' if bad else 'ok':<5}{path}")
+                    print("     " + " ".join(statement.split())[:160])
+                    for line in lines:
+                        print(f"       {line}")
+                    if bad:
+                        print(f"     sequential scan of {', '.join(bad)}")
+
+    print(f"\n{failures} statement(s) scan a table of more than {args.min_rows} rows" if failures
+          else "\nevery filtered list query uses an index")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+"""
+Measure /search latency on a large synthetic catalog.
+
+Generates --rows names split across the four tables, built from syllables
+and the prefixes and suffixes real catalog names use ("Kuva", "Prime",
+"Vandal"...), seeds them through the bulk loader and sends /search queries
+in-process with the response cache off: exact names, prefixes, names with a
+typo and two-word queries. Prints the time of the first search (which builds
+the in-memory index, unless on PostgreSQL) and p50/p99 latency per query
+kind.
+
+    python benchmarks/search_latency.py --rows 100000
+    python benchmarks/search_latency.py --database-url postgresql://... --rows 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+SYLLABLES = ("ser", "ra", "tion", "rhi", "no", "bo", "ar", "kan", "te", "vor", "lex", "ash", "ny", "x",
+             "ex", "ca", "li", "bur", "ze", "phyr", "gor", "gon", "ha", "lo", "tri", "nas", "sy", "ma")
+PREFIXES = ("", "", "", "Kuva ", "Tenet ", "Primed ", "Prisma ", "Mk1-", "Dex ", "Rakta ")
+SUFFIXES = ("", "", "", " Prime", " Vandal", " Wraith", " Strike", " Chamber", " Blade", " Shot")
+# Share of the rows each table gets
+SHARES = {"weapons": 0.4, "mods": 0.4, "warframes": 0.1, "abilities": 0.1}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="database to seed and search (default: a temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=100000, help="names across all four tables")
+    parser.add_argument("--queries", type=int, default=200, help="timed searches per query kind")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for names and queries")
+    return parser.parse_args()
+
+
+def make_names(rng: random.Random, count: int) -> list:
+    names = set()
+    while len(names) < count:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+        names.add(f"{rng.choice(PREFIXES)}{word}{rng.choice(SUFFIXES)}")
+    return sorted(names)
+
+
+def write_catalog(directory: str, names: dict):
+    records = {
+        "abilities": lambda name: {"name": name, "description": "Synthetic", "energy_cost": 25},
+        "warframes": lambda name: {"name": name, "health": 100, "shield": 100, "armor": 100, "energy": 100,
+                                   "description": "Synthetic"},
+        "weapons": lambda name: {"name": name, "type": "Primary", "damage": 10.0, "critical_chance": 0.1,
+                                 "critical_multiplier": 2.0, "status_chance": 0.1, "description": "Synthetic"},
+        "mods": lambda name: {"name": name, "type": "Primary", "rarity": "Common", "drain": 4,
+                              "description": "Synthetic", "effect": "+10% Damage"},
+    }
+    for table, make in records.items():
+        with open(os.path.join(directory, f"{table}.ndjson"), "w") as file:
+            for name in names[table]:
+                file.write(json.dumps(make(name)) + "\n")
+
+
+def typo(rng: random.Random, word: str) -> str:
+    """Drop, double or swap one letter"""
+    i = rng.randrange(1, len(word) - 1)
+    return rng.choice((word[:i] + word[i + 1:], word[:i] + word[i] + word[i:], word[:i] + word[i + 1] + word[i] + word[i + 2:]))
+
+
+def queries(rng: random.Random, names: list, count: int) -> dict:
+    sample = [rng.choice(names) for _ in range(count)]
+    longest = [max(name.split(), key=len) for name in sample]
+    return {
+        "exact": sample,
+        "prefix": [word[:rng.randint(2, max(2, len(word) - 2))] for word in longest],
+        "typo": [typo(rng, word) for word in longest],
+        "two words": [f"{word} {rng.choice(SUFFIXES[3:]).strip()}" for word in longest],
+    }
+
+
+async def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        directory = tempfile.mkdtemp(prefix="warframe-search-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'catalog.db')}"
+    os.environ["CACHE_TTL"] = "0"
+
+    import httpx
+
+    from database import created_engines, get_engine
+    from index import app
+    from search import SEARCH_BACKEND
+    from seeding import seed
+
+    rng = random.Random(args.seed)
+    all_names = make_names(rng, args.rows)
+    rng.shuffle(all_names)
+    names, start = {}, 0
+    for table, share in SHARES.items():
+        names[table] = all_names[start:start + int(args.rows * share)]
+        start += len(names[table])
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_catalog(data_dir, names)
+        seed(get_engine(), data_dir)
+    print(f"seeded {start} names, search backend: {SEARCH_BACKEND}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://search") as client:
+        started = time.perf_counter()
+        (await client.get("/search", params={"q": "warmup"})).raise_for_status()
+        print(f"first search: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        print(f"\n{'query kind':<12}{'p50 ms':>9}{'p99 ms':>9}{'found':>8}")
+        for kind, batch in queries(rng, all_names[:start], args.queries).items():
+            latencies, found = [], 0
+            for q in batch:
+                started = time.perf_counter()
+                response = await client.get("/search", params={"q": q})
+                latencies.append((time.perf_counter() - started) * 1000)
+                response.raise_for_status()
+                found += bool(response.json())
+            cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+            print(f"{kind:<12}{cuts[49]:>9.2f}{cuts[98]:>9.2f}{found / len(batch):>8.0%}")
+
+    if "async" in created_engines():
+        # Pooled aiosqlite connections keep their worker threads alive
+        await created_engines()["async"].dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""
+Compare the default and fast serialization paths of list responses.
+
+Seeds an in-memory SQLite database with weapons, then times fetching and
+encoding one page both ways and checks the bodies are byte-identical.
+
+    python benchmarks/serialization.py --rows 100 --repeat 200
+"""
+import argparse
+import os
+import sys
+import timeit
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from pydantic import parse_obj_as  # noqa: E402
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from models import Base, Weapon  # noqa: E402
+from schemas import WeaponResponse  # noqa: E402
+from serializers import render_dicts, render_json, scalar_fields  # noqa: E402
+
+
+def seed(session: Session, rows: int):
+    session.add_all(
+        Weapon(
+            name=f"Weapon {i}",
+            type=("Primary", "Secondary", "Melee")[i % 3],
+            damage=10.0 + i % 90,
+            critical_chance=0.05 + (i % 20) / 100,
+            critical_multiplier=1.5 + (i % 10) / 10,
+            status_chance=0.1 + (i % 15) / 100,
+            description="A weapon used for benchmarking the serialization paths. " * 3,
+        )
+        for i in range(rows)
+    )
+    session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100, help="rows per page")
+    parser.add_argument("--repeat", type=int, default=200, help="timed iterations per path")
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    fields = scalar_fields(WeaponResponse)
+    query = select(Weapon).order_by(Weapon.id).limit(args.rows)
+
+    with Session(engine) as session:
+        seed(session, args.rows)
+
+        def default_path():
+            session.expunge_all()
+            weapons = session.scalars(query).all()
+            return render_json(jsonable_encoder(parse_obj_as(List[WeaponResponse], weapons)))
+
+        def fast_path():
+            result = session.execute(query.with_only_columns(*(getattr(Weapon, f) for f in fields)))
+            return render_dicts([dict(zip(fields, row)) for row in result])
+
+        if default_path() != fast_path():
+            sys.exit("bodies differ between the default and fast paths")
+
+        results = {}
+        for name, path in (("default", default_path), ("fast", fast_path)):
+            seconds = min(timeit.repeat(path, number=args.repeat, repeat=3)) / args.repeat
+            results[name] = seconds
+            print(f"{name:>8}: {seconds * 1000:8.3f} ms per {args.rows}-row page")
+        print(f" speedup: {results['default'] / results['fast']:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Measure the per-request cost of User-Agent classification.
+
+Times the original loop of re.search calls (run several times per request
+before the classifier was memoized), the precompiled classifier on a cold
+cache, and a cached lookup, over a mix of browser, bot and API client UAs.
+
+    python benchmarks/user_agents.py --repeat 20000
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from utils import classify_user_agent  # noqa: E402
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/124.0.0.0 Safari/537.36 Edg/124.0.2478.51",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+    "Version/17.4 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "python-requests/2.31.0",
+    "curl/8.5.0",
+    "okhttp/4.12.0",
+    "",
+]
+
+# Calls per request before the result was shared through request.state:
+# middleware, dependency, and twice in the route
+CALLS_PER_REQUEST = 4
+
+_LEGACY_PATTERNS = [r"Mozilla", r"Chrome", r"Safari", r"Firefox", r"Edge", r"Opera", r"MSIE|Trident"]
+
+
+def legacy_is_browser(user_agent: str) -> bool:
+    if not user_agent:
+        return False
+    return any(re.search(pattern, user_agent) for pattern in _LEGACY_PATTERNS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20000, help="timed requests per variant")
+    args = parser.parse_args()
+
+    for user_agent in USER_AGENTS:
+        if legacy_is_browser(user_agent) != classify_user_agent(user_agent).is_browser:
+            sys.exit(f"classifiers disagree on {user_agent!r}")
+
+    def legacy():
+        for user_agent in USER_AGENTS:
+            for _ in range(CALLS_PER_REQUEST):
+                legacy_is_browser(user_agent)
+
+    def uncached():
+        for user_agent in USER_AGENTS:
+            classify_user_agent.__wrapped__(user_agent)
+
+    def cached():
+        for user_agent in USER_AGENTS:
+            classify_user_agent(user_agent)
+
+    results = {}
+    for name, variant in (("legacy", legacy), ("uncached", uncached), ("cached", cached)):
+        seconds = min(timeit.repeat(variant, number=args.repeat, repeat=3)) / (args.repeat * len(USER_AGENTS))
+        results[name] = seconds
+        print(f"{name:>9}: {seconds * 1e6:8.3f} us per request")
+    print(f"  speedup: {results['legacy'] / results['cached']:8.1f}x cached, "
+          f"{results['legacy'] / results['uncached']:.1f}x uncached")
+
+
+if __name__ == "__main__":
+    main()
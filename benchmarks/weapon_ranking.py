@@ -0,0 +1,125 @@
+"""
+Measure /weapons/ranking latency on a large synthetic weapons table.
+
+Seeds --rows weapons with random stats through the bulk loader and sends
+ranking requests in-process with the response cache off, for a few metrics,
+with and without a type filter. Prints the time of the first ranking (which
+loads the table into NumPy arrays) and p50/p99 latency per request kind,
+next to a row-by-row Python ranking of the same rows for comparison.
+
+    python benchmarks/weapon_ranking.py --rows 100000
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+TYPES = ("Primary", "Secondary", "Melee")
+KINDS = (
+    ("avg_damage", None, 20),
+    ("avg_damage", "Primary", 20),
+    ("crit_damage", "Melee", 100),
+    ("status_chance", None, 1000),
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="database to seed and rank (default: a temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=100000, help="weapons to seed")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per kind")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the stats")
+    return parser.parse_args()
+
+
+def write_weapons(directory: str, rng: random.Random, count: int):
+    with open(os.path.join(directory, "weapons.ndjson"), "w") as file:
+        for i in range(count):
+            file.write(json.dumps({
+                "name": f"Weapon {i}",
+                "type": rng.choice(TYPES),
+                "damage": round(rng.uniform(10, 500), 1),
+                "critical_chance": round(rng.uniform(0, 0.6), 2),
+                "critical_multiplier": round(rng.uniform(1.5, 3.5), 1),
+                "status_chance": round(rng.uniform(0, 0.5), 2),
+                "description": "Synthetic",
+            }) + "\n")
+
+
+def python_rank(rows, metric, weapon_type, limit):
+    """The same ranking done one row at a time, as clients did it"""
+    from weapon_stats import METRICS, STAT_COLUMNS
+
+    formula = METRICS[metric]
+    scored = (
+        (formula(dict(zip(STAT_COLUMNS, row[3:]))), -row[0], row)
+        for row in rows if weapon_type is None or row[2] == weapon_type
+    )
+    return heapq.nlargest(limit, scored)
+
+
+async def main():
+    args = parse_args()
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        directory = tempfile.mkdtemp(prefix="warframe-ranking-")
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'catalog.db')}"
+    os.environ["CACHE_TTL"] = "0"
+
+    import httpx
+    from sqlalchemy import select
+
+    from database import created_engines, get_engine
+    from index import app
+    from models import Weapon
+    from seeding import seed
+    from weapon_stats import STAT_COLUMNS
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_weapons(data_dir, rng, args.rows)
+        seed(get_engine(), data_dir)
+    with get_engine().connect() as connection:
+        columns = [Weapon.id, Weapon.name, Weapon.type, *(getattr(Weapon, name) for name in STAT_COLUMNS)]
+        rows = connection.execute(select(*columns)).all()
+    print(f"seeded {len(rows)} weapons")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://ranking") as client:
+        started = time.perf_counter()
+        (await client.get("/weapons/ranking")).raise_for_status()
+        print(f"first ranking: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        print(f"\n{'metric':<15}{'type':<11}{'limit':>6}{'p50 ms':>9}{'p99 ms':>9}{'python ms':>11}")
+        for metric, weapon_type, limit in KINDS:
+            params = {"metric": metric, "limit": limit}
+            if weapon_type:
+                params["weapon_type"] = weapon_type
+            latencies = []
+            for _ in range(args.requests):
+                started = time.perf_counter()
+                response = await client.get("/weapons/ranking", params=params)
+                latencies.append((time.perf_counter() - started) * 1000)
+                response.raise_for_status()
+            cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+            started = time.perf_counter()
+            python_rank(rows, metric, weapon_type, limit)
+            python_ms = (time.perf_counter() - started) * 1000
+            print(f"{metric:<15}{weapon_type or 'any':<11}{limit:>6}{cuts[49]:>9.2f}{cuts[98]:>9.2f}{python_ms:>11.1f}")
+
+    if "async" in created_engines():
+        # Pooled aiosqlite connections keep their worker threads alive
+        await created_engines()["async"].dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())